@@ -0,0 +1,197 @@
+import os
+import signal
+import threading
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, filedialog, scrolledtext, messagebox
+
+import auto_annotator
+from metadata_store import METADATA_CSV, get_metadata_store
+from metrics import MetricsExporter
+from ui_pump import UIUpdatePump, WindowedTreeview
+
+class PDFCategorizerGUI(tk.Tk):
+    """Window for auto_annotator.Categorizer: pick a PDF folder or the scraped metadata and an
+       output CSV, and watch the categories come in."""
+    def __init__(self):
+        super().__init__()
+        self.title("PDF Categorizer")
+        # Increase width of the window (set width to 1200 pixels, height to 600 pixels)
+        self.geometry("1200x600")
+        self.configure(bg="#2C3E50")
+
+        self.pdf_folder = tk.StringVar(value=auto_annotator.PDF_FOLDER_PATH)
+        # New variable to choose CSV mode: "append" or "new"
+        self.csv_mode = tk.StringVar(value="append")
+        # Entry variable for new CSV filename (only used if csv_mode=="new")
+        self.new_csv_filename = tk.StringVar(value="")
+        # Skip PDFs that already have a category in the chosen CSV
+        self.resume_run = tk.BooleanVar(value=True)
+
+        self.create_widgets()
+        if auto_annotator.METRICS_SNAPSHOT_FILE or auto_annotator.METRICS_PORT is not None:
+            MetricsExporter(snapshot_path=auto_annotator.METRICS_SNAPSHOT_FILE, port=auto_annotator.METRICS_PORT).start()
+
+    def create_widgets(self):
+        # Top frame for folder selection and CSV mode options
+        top_frame = ttk.Frame(self, padding=10)
+        top_frame.pack(side=tk.TOP, fill=tk.X)
+
+        ttk.Label(top_frame, text="PDF Folder:", background="#2C3E50", foreground="#ECF0F1", font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
+        self.folder_entry = ttk.Entry(top_frame, textvariable=self.pdf_folder, width=60, font=("Helvetica", 12))
+        self.folder_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="Browse...", command=self.browse_folder, width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="Start Categorization", command=self.start_categorization, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="From Metadata...", command=self.start_metadata_categorization, width=16).pack(side=tk.LEFT, padx=5)
+        ttk.Label(top_frame, text="Extraction Workers:", background="#2C3E50", foreground="#ECF0F1", font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
+        self.extraction_workers = ttk.Spinbox(top_frame, from_=1, to=64, width=5, font=("Helvetica", 12))
+        self.extraction_workers.set(auto_annotator.EXTRACTION_WORKERS)
+        self.extraction_workers.pack(side=tk.LEFT, padx=5)
+
+        csv_option_frame = ttk.Frame(self, padding=10)
+        csv_option_frame.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(csv_option_frame, text="CSV Mode:", background="#2C3E50", foreground="#ECF0F1", font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(csv_option_frame, text="Append to Existing CSV", variable=self.csv_mode, value="append", command=self.toggle_csv_entry).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(csv_option_frame, text="Create New CSV", variable=self.csv_mode, value="new", command=self.toggle_csv_entry).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(csv_option_frame, text="Resume (skip categorized PDFs)", variable=self.resume_run).pack(side=tk.RIGHT, padx=5)
+        self.csv_entry = ttk.Entry(csv_option_frame, textvariable=self.new_csv_filename, width=40, font=("Helvetica", 12))
+        self.csv_entry.pack_forget()
+
+        # Progress bar
+        self.progress_var = tk.DoubleVar()
+        self.progress_bar = ttk.Progressbar(self, variable=self.progress_var, maximum=100)
+        self.progress_bar.pack(fill=tk.X, padx=10, pady=5)
+
+        # Only the rows on screen are materialized, however many PDFs are processed
+        columns = ("PDF Name", "Category")
+        self.tree = WindowedTreeview(self, columns, widths={"PDF Name": 300, "Category": 300})
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Log area
+        log_frame = ttk.LabelFrame(self, text="Log", padding=10)
+        log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.log_area = scrolledtext.ScrolledText(log_frame, height=10, wrap=tk.WORD, font=("Helvetica", 12))
+        self.log_area.pack(fill=tk.BOTH, expand=True)
+
+        # All widget updates from worker threads go through this queue
+        self.ui = UIUpdatePump(self, self.log_area)
+        self.ui.start()
+
+        self.style_widgets()
+
+    def toggle_csv_entry(self):
+        if self.csv_mode.get() == "new":
+            self.csv_entry.pack(side=tk.LEFT, padx=5)
+        else:
+            self.csv_entry.pack_forget()
+
+    def style_widgets(self):
+        style = ttk.Style()
+        style.theme_use("clam")
+
+        # Colors
+        primary = "#3498db"    
+        secondary = "#2980b9" 
+        bg_color = "#2C3E50"  
+        accent = "#e67e22"    
+        text_color = "#ECF0F1" 
+
+        style.configure("TLabel", background=bg_color, foreground=text_color, font=("Helvetica", 12))
+        style.configure("Header.TLabel", background=bg_color, foreground=primary, font=("Helvetica", 26, "bold"))
+
+        style.configure("TButton", background=primary, foreground="white", font=("Helvetica", 12, "bold"), padding=8)
+        style.map("TButton",
+                  background=[("active", secondary)],
+                  foreground=[("active", "white")])
+        style.configure("TEntry", fieldbackground="white", foreground="black", font=("Helvetica", 12))
+        style.configure("TCombobox", fieldbackground="white", foreground="black", font=("Helvetica", 12))
+
+    def browse_folder(self):
+        folder_selected = filedialog.askdirectory(initialdir=self.pdf_folder.get())
+        if folder_selected:
+            self.pdf_folder.set(folder_selected)
+
+    def log(self, message):
+        timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S] ")
+        self.ui.log(timestamp + message)
+
+    def get_csv_filename(self):
+        """Returns the CSV filename based on the CSV mode.
+           If 'append', returns the pre-configured CSV_OUTPUT_FILE.
+           If 'new', returns the name entered by the user or a timestamped default."""
+        if self.csv_mode.get() == "append":
+            return auto_annotator.CSV_OUTPUT_FILE
+        else:
+            new_name = self.new_csv_filename.get().strip()
+            if new_name:
+                # Ensure the new file name ends with .csv
+                if not new_name.lower().endswith(".csv"):
+                    new_name += ".csv"
+                return new_name
+            else:
+                base, ext = os.path.splitext(auto_annotator.CSV_OUTPUT_FILE)
+                new_filename = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+                return new_filename
+
+    def get_extraction_workers(self):
+        try:
+            return max(1, int(self.extraction_workers.get()))
+        except ValueError:
+            return auto_annotator.EXTRACTION_WORKERS
+
+    def make_categorizer(self):
+        """A categorizer for one run, with the options currently set in the window."""
+        return auto_annotator.Categorizer(self.get_csv_filename(), self.get_extraction_workers(), on_log=self.log,
+                                          on_result=lambda pdf_name, category: self.ui.call(self.tree.append_row, (pdf_name, category)),
+                                          on_progress=lambda percent: self.ui.set_var(self.progress_var, percent))
+
+    def run_in_background(self, work, *args):
+        def run():
+            try:
+                work(*args)
+            except auto_annotator.MissingAPIKeyError as e:
+                self.log(str(e))
+            except Exception as e:
+                message = f"Categorization failed: {e}"
+                self.log(message)
+                self.ui.call(messagebox.showerror, "Categorization", message)
+        threading.Thread(target=run, daemon=True).start()
+
+    def start_metadata_categorization(self):
+        metadata_csv = None
+        if get_metadata_store().paper_count() == 0:
+            metadata_csv = filedialog.askopenfilename(title="Select Scraped Metadata CSV", initialfile=METADATA_CSV,
+                                                      filetypes=[("CSV files", "*.csv")])
+            if not metadata_csv:
+                return
+
+        categorizer = self.make_categorizer()
+
+        self.tree.clear()
+        self.log_area.delete("1.0", tk.END)
+        self.progress_var.set(0)
+
+        self.run_in_background(categorizer.process_metadata, metadata_csv, self.resume_run.get())
+
+    def start_categorization(self):
+        folder = self.pdf_folder.get()
+        if not os.path.isdir(folder):
+            messagebox.showerror("Error", "Please select a valid PDF folder.")
+            return
+
+        categorizer = self.make_categorizer()
+
+        self.tree.clear()
+        self.log_area.delete("1.0", tk.END)
+        self.progress_var.set(0)
+
+        self.run_in_background(categorizer.process_folder, folder, self.resume_run.get())
+
+
+def main():
+    signal.signal(signal.SIGINT, auto_annotator.signal_handler)
+    app = PDFCategorizerGUI()
+    app.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,23 @@
 import os
+import asyncio
 import time
 import csv
-import google.generativeai as genai
-from PyPDF2 import PdfReader
+import io
+import atexit
+import json
+import random
+import re
+from llm_cache import CategoryCache, make_cache_key
+from label_model import LabelModel
+from dedup import DuplicateIndex, is_comparable_abstract, text_fingerprint, text_shingles
+from metadata_store import get_metadata_store, pdf_filename, title_from_pdf_name
+from metrics import registry as metrics
+from retry_policy import PERMANENT, QUOTA, CircuitBreaker, RetryPolicy, classify_exception, retry_after_from_error
 from datetime import datetime
-import itertools
-import signal  
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import sys
 import threading
-import tkinter as tk
-from tkinter import ttk, filedialog, scrolledtext, messagebox
 
 # --- Configuration ---
 PDF_FOLDER_PATH = r'D:\Semester 6\Data Science\python-scraping\scraped_pdfs'
@@ -25,67 +33,243 @@ LABELS = [
     "Robotics",
 ]
 GENERIC_LABELS_PROMPT = ", ".join(LABELS)
-GEMINI_API_KEYS = [
-    os.getenv("GOOGLE_API_KEY"),
-    os.getenv("GOOGLE_API_KEY2"),
-    os.getenv("GOOGLE_API_KEY3")
-]
+# API keys; None reads them from these environment variables when the first request is made
+GEMINI_API_KEYS = None
+GEMINI_API_KEY_ENV_VARS = ["GOOGLE_API_KEY", "GOOGLE_API_KEY2", "GOOGLE_API_KEY3"]
 MODEL_NAME = "gemini-1.5-flash"
 CSV_OUTPUT_FILE = r'D:\Semester 6\Data Science\python-scraping\python_metadata.csv'
 API_TIMEOUT_SECONDS = 90
+# Per-key quota; adjust to your tier (defaults are the gemini-1.5-flash free tier)
+GEMINI_RPM_LIMIT = 15
+GEMINI_TPM_LIMIT = 1000000
+MAX_RETRIES_PER_KEY = 3
+# Transient errors (timeouts, 5xx) are retried with exponential backoff and full jitter
+GEMINI_BACKOFF_BASE_SECONDS = 1.0
+GEMINI_BACKOFF_MAX_SECONDS = 60.0
+# A 429 takes its key out of rotation for the server's Retry-After, or for a cooldown
+# that doubles with each consecutive 429 on that key; other keys keep serving meanwhile
+KEY_COOLDOWN_BASE_SECONDS = 5.0
+KEY_COOLDOWN_MAX_SECONDS = 120.0
+# Categorization requests in flight at once, across all keys
+MAX_CONCURRENT_REQUESTS = 16
+# Papers packed into one categorization request (1 sends each paper on its own)
+CATEGORIZATION_BATCH_SIZE = 10
+# Bump whenever the prompt wording changes, so cached answers to the old prompt are not reused
+PROMPT_VERSION = 1
+USE_CATEGORY_CACHE = True
+CATEGORY_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "category_cache.sqlite3")
+CATEGORY_CACHE_MAX_ENTRIES = 500000
+CATEGORY_CACHE_MAX_AGE_DAYS = 365
+# Local classifier trained on Gemini's answers; it answers the papers it is confident about,
+# at thresholds calibrated to agree with Gemini on LOCAL_MODEL_TARGET_AGREEMENT of held-out
+# papers. LOCAL_MODEL_AUDIT_RATE of its confident answers are still checked against Gemini.
+USE_LOCAL_MODEL = True
+LOCAL_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "label_model.sqlite3")
+LOCAL_MODEL_TARGET_AGREEMENT = 0.95
+LOCAL_MODEL_MIN_EXAMPLES = 500
+LOCAL_MODEL_HOLDOUT_FRACTION = 0.2
+LOCAL_MODEL_AUDIT_RATE = 0.05
+# Results that a resumed run processes again
+RETRY_CATEGORIES = {"API Error", "API Error (Retries Exhausted)", "Text Extraction Failed", "Uncategorized",
+                    "Download Failed"}
+# Output CSV rows are buffered and appended in batches
+CSV_FLUSH_ROWS = 50
+CSV_FLUSH_SECONDS = 2.0
+# The abstract is almost always on page 1; page 2 is only read if it runs over
+ABSTRACT_MAX_PAGES = 2
+# Returned by extract_abstract_from_pdf when a PDF has no recognizable abstract
+ABSTRACT_NOT_FOUND = "Abstract Not Found"
+INTRODUCTION_HEADING = re.compile(r"^\s*(1\.?\s*)?introduction\b", re.IGNORECASE)
+# Number of processes parsing PDFs in parallel
+EXTRACTION_WORKERS = os.cpu_count() or 1
+
+# Metrics export: a JSON snapshot file rewritten periodically and/or a Prometheus
+# endpoint on 127.0.0.1 (None disables either); a summary is logged after every run
+METRICS_SNAPSHOT_FILE = None
+METRICS_PORT = None
+
+# Built on first use: one model client and quota bucket per API key
+gemini_key_pool = None
+gemini_key_pool_lock = threading.Lock()
+category_cache = None
+category_cache_lock = threading.Lock()
+label_model = None
+label_model_lock = threading.Lock()
 
-# Filter out any None keys
-GEMINI_API_KEYS = [key for key in GEMINI_API_KEYS if key]
-if not GEMINI_API_KEYS:
-    print("Error: No Gemini API keys found. Please set up at least one API key.")
-    sys.exit(1)
+pdf_categories_global = {}
+# Writers that still hold buffered rows; flushed on exit and SIGINT
+open_csv_writers = set()
 
-print(f"DEBUG: Loaded {len(GEMINI_API_KEYS)} Gemini API keys.")
+class MissingAPIKeyError(RuntimeError):
+    """No Gemini API key is configured."""
 
-# Create a cycling iterator for API keys
-api_key_cycle = itertools.cycle(GEMINI_API_KEYS)
+def gemini_api_keys():
+    """The configured API keys: GEMINI_API_KEYS if set, else the environment variables."""
+    keys = GEMINI_API_KEYS if GEMINI_API_KEYS is not None else [os.getenv(name) for name in GEMINI_API_KEY_ENV_VARS]
+    return [key for key in keys if key]
 
-pdf_categories_global = {}
-csv_header_written = False
+def is_abstract_end(line):
+    """The abstract block ends at an empty line or at the first section heading."""
+    return line.strip() == "" or INTRODUCTION_HEADING.match(line) is not None
 
-def extract_abstract_from_pdf(pdf_path):
+def extract_abstract_from_pdf(pdf_path, max_pages=None):
     """Extracts only the abstract from a PDF file.
-       Assumes that the abstract starts with a line containing 'Abstract' and ends with an empty line."""
-    text = ""
+       Assumes that the abstract starts with a line containing 'Abstract' and ends with an empty line
+       or the Introduction heading. Pages are read lazily: the next page is only parsed while the
+       abstract has not been found or has not ended yet, up to max_pages (default ABSTRACT_MAX_PAGES)."""
+    # Imported on first use, once per extraction worker
+    from PyPDF2 import PdfReader
+    max_pages = max_pages or ABSTRACT_MAX_PAGES
+    abstract_lines = []
+    capturing = False
     try:
         with open(pdf_path, 'rb') as pdf_file:
             reader = PdfReader(pdf_file)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+            for page_index in range(min(len(reader.pages), max_pages)):
+                page_text = reader.pages[page_index].extract_text()
+                if not page_text:
+                    continue
+                for line in page_text.split("\n"):
+                    if not capturing:
+                        if "abstract" in line.lower():
+                            capturing = True
+                        continue
+                    if is_abstract_end(line):
+                        return " ".join(abstract_lines) if abstract_lines else ABSTRACT_NOT_FOUND
+                    abstract_lines.append(line.strip())
     except Exception as e:
         print(f"Error reading PDF {pdf_path}: {e}")
         return None
 
-    #Extract the abstract section
-    abstract = ""
-    lower_text = text.lower()
-    if "abstract" in lower_text:
-        lines = text.split("\n")
-        capturing = False
-        for line in lines:
-            if "abstract" in line.lower():
-                capturing = True
-                continue
-            if capturing:
-                if line.strip() == "":
-                    break
-                abstract += line.strip() + " "
-    return abstract.strip() if abstract else "Abstract Not Found"
-
-def categorize_pdf_with_gemini(paper_title, paper_abstract, labels_prompt=GENERIC_LABELS_PROMPT):
-    """Categorizes a research paper using its title and abstract.
-       Implements API key rotation and retry logic."""
-    if not paper_title and not paper_abstract:
-        return "No Text Extracted"
-
-    prompt_content = f"""
+    return " ".join(abstract_lines) if abstract_lines else ABSTRACT_NOT_FOUND
+
+def extract_abstract_timed(pdf_path):
+    """Runs in an extraction worker; returns (abstract, seconds) so the parent can record
+       the extraction time without the time spent queued for a worker."""
+    start = time.perf_counter()
+    abstract = extract_abstract_from_pdf(pdf_path)
+    return abstract, time.perf_counter() - start
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to `capacity` tokens per minute."""
+    def __init__(self, capacity_per_minute):
+        self.capacity = float(capacity_per_minute)
+        self.tokens = self.capacity
+        self.refill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def fill_ratio(self):
+        self.refill()
+        return self.tokens / self.capacity
+
+    def wait_time(self, amount):
+        """Seconds until `amount` tokens are available (0 if they already are)."""
+        self.refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.refill_rate)
+
+    def consume(self, amount):
+        self.refill()
+        self.tokens -= amount
+
+
+class GeminiKeyClient:
+    """One API key with its own SDK client, request/token buckets and circuit breaker."""
+    def __init__(self, index, api_key, model_name, rpm_limit, tpm_limit):
+        self.index = index
+        self.api_key = api_key
+        self.model_name = model_name
+        self.client = None
+        self.client_lock = threading.Lock()
+        self.request_bucket = TokenBucket(rpm_limit)
+        self.token_bucket = TokenBucket(tpm_limit)
+        self.breaker = CircuitBreaker(KEY_COOLDOWN_BASE_SECONDS, KEY_COOLDOWN_MAX_SECONDS)
+
+    def remaining_capacity(self):
+        if self.breaker.is_open():
+            return 0.0
+        return min(self.request_bucket.fill_ratio(), self.token_bucket.fill_ratio())
+
+    def wait_time(self, tokens):
+        return max(self.breaker.remaining(), self.request_bucket.wait_time(1), self.token_bucket.wait_time(tokens))
+
+    def consume(self, tokens):
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(tokens)
+
+    def generate_content(self, prompt, generation_config=None):
+        """Sends one prompt with this key; blocking. Each key has a google.genai.Client of its
+           own, so no library-wide configuration is shared between keys."""
+        with self.client_lock:
+            if self.client is None:
+                # The Gemini SDK is slow to import and only needed once a request is made
+                from google import genai
+                from google.genai import types
+                self.client = genai.Client(api_key=self.api_key,
+                                           http_options=types.HttpOptions(timeout=API_TIMEOUT_SECONDS * 1000))
+        return self.client.models.generate_content(model=self.model_name, contents=prompt, config=generation_config)
+
+class GeminiKeyPool:
+    """Hands out the key with the most remaining quota for each request."""
+    def __init__(self, api_keys, model_name=None, rpm_limit=None, tpm_limit=None):
+        model_name = model_name or MODEL_NAME
+        rpm_limit = rpm_limit or GEMINI_RPM_LIMIT
+        tpm_limit = tpm_limit or GEMINI_TPM_LIMIT
+        self.clients = [GeminiKeyClient(index, key, model_name, rpm_limit, tpm_limit)
+                        for index, key in enumerate(api_keys)]
+        self.retry_policy = RetryPolicy(len(self.clients) * MAX_RETRIES_PER_KEY,
+                                        GEMINI_BACKOFF_BASE_SECONDS, GEMINI_BACKOFF_MAX_SECONDS)
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens):
+        """Returns (client, 0) with quota already consumed, or (None, seconds to wait)."""
+        with self.lock:
+            best = max(self.clients, key=lambda client: client.remaining_capacity())
+            if best.wait_time(tokens) <= 0:
+                best.consume(tokens)
+                return best, 0.0
+            return None, min(client.wait_time(tokens) for client in self.clients)
+
+    def acquire(self, tokens):
+        with metrics.timer('gemini_key_wait_seconds'):
+            while True:
+                client, wait = self.reserve(tokens)
+                if client:
+                    return client
+                time.sleep(wait)
+
+    async def acquire_async(self, tokens):
+        with metrics.timer('gemini_key_wait_seconds'):
+            while True:
+                client, wait = self.reserve(tokens)
+                if client:
+                    return client
+                await asyncio.sleep(wait)
+
+def get_gemini_key_pool():
+    """The key pool, built on first use from the configuration at that time. Raises
+       MissingAPIKeyError when no key is configured."""
+    global gemini_key_pool
+    with gemini_key_pool_lock:
+        if gemini_key_pool is None:
+            api_keys = gemini_api_keys()
+            if not api_keys:
+                raise MissingAPIKeyError("No Gemini API keys found. Set GOOGLE_API_KEY (and optionally "
+                                         "GOOGLE_API_KEY2, GOOGLE_API_KEY3) or GEMINI_API_KEYS in auto_annotator.py.")
+            gemini_key_pool = GeminiKeyPool(api_keys, MODEL_NAME, GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT)
+    return gemini_key_pool
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token) plus room for the reply."""
+    return len(text) // 4 + 16
+
+def build_categorization_prompt(paper_title, paper_abstract, labels_prompt=GENERIC_LABELS_PROMPT):
+    return f"""
 Instructions: You are an expert research paper classifier.
 You are provided with a research paper's title and abstract.
 Based on the content, classify the paper into one of the following categories:
@@ -101,235 +285,649 @@ Research Paper Abstract:
 
 Category:
 """
-    max_retries_per_key = 3
-    api_error_delay = 60
-    api_keys_tried_count = 0
-    keys_exhausted_delay_occurred = False
 
-    while api_keys_tried_count < len(GEMINI_API_KEYS) * max_retries_per_key:
-        try:
-            current_api_key = next(api_key_cycle)
-            genai.configure(api_key=current_api_key)
-            model = genai.GenerativeModel(MODEL_NAME)
-            response = model.generate_content(prompt_content) 
-            gemini_output = response.text.strip()
+def parse_category(gemini_output):
+    canonical_labels = {label.lower(): label for label in LABELS + ["Other"]}
+    if gemini_output.lower() not in canonical_labels:
+        print(f"Warning: Gemini returned unexpected label: '{gemini_output}'.")
+        return "Uncategorized"
+    return canonical_labels[gemini_output.lower()]
+
+def get_category_cache():
+    global category_cache
+    with category_cache_lock:
+        if category_cache is None:
+            category_cache = CategoryCache(CATEGORY_CACHE_PATH, CATEGORY_CACHE_MAX_ENTRIES, CATEGORY_CACHE_MAX_AGE_DAYS)
+    return category_cache
+
+def lookup_cached_category(paper_title, paper_abstract, labels_prompt):
+    """Returns (cache key, cached category or None)."""
+    if not USE_CATEGORY_CACHE:
+        return None, None
+    key = make_cache_key(paper_title, paper_abstract, labels_prompt, MODEL_NAME, PROMPT_VERSION)
+    category = get_category_cache().get(key)
+    metrics.inc('category_cache_lookups_total', result='hit' if category else 'miss')
+    return key, category
+
+def store_cached_category(key, category):
+    # Only real answers are cached; errors and "Uncategorized" are retried next run
+    if key and category in LABELS + ["Other"]:
+        get_category_cache().put(key, category, MODEL_NAME)
+
+def get_label_model():
+    """The local model, trained from its stored answers. On first use it also learns the
+       categories already recorded for papers whose abstract is in the metadata store."""
+    global label_model
+    with label_model_lock:
+        if label_model is None:
+            # "Other" is a label like the rest: Gemini's "Other" answers are learned and
+            # calibrated against, instead of being invisible to the model
+            label_model = LabelModel(LOCAL_MODEL_PATH, LABELS + ["Other"], LOCAL_MODEL_TARGET_AGREEMENT,
+                                     LOCAL_MODEL_MIN_EXAMPLES, LOCAL_MODEL_HOLDOUT_FRACTION)
+            if not label_model.trained and not label_model.held_out:
+                for title, abstract, category in get_metadata_store().categorized_abstracts():
+                    label_model.learn(title, abstract, category)
+    return label_model
+
+def local_category(paper_title, paper_abstract, labels_prompt):
+    """Returns (the local model's category, or None to ask Gemini; the local category to
+       audit Gemini's answer against, or None)."""
+    if not USE_LOCAL_MODEL or labels_prompt != GENERIC_LABELS_PROMPT:
+        return None, None
+    category = get_label_model().classify(paper_title, paper_abstract)
+    if category is None:
+        metrics.inc('local_model_decisions_total', result='gemini')
+        return None, None
+    if random.random() < LOCAL_MODEL_AUDIT_RATE:
+        metrics.inc('local_model_decisions_total', result='audit')
+        return None, category
+    metrics.inc('local_model_decisions_total', result='local')
+    return category, None
+
+def remember_category(cache_key, paper_title, paper_abstract, labels_prompt, category, audit_category=None):
+    """Caches a Gemini answer and teaches it to the local model."""
+    store_cached_category(cache_key, category)
+    if USE_LOCAL_MODEL and labels_prompt == GENERIC_LABELS_PROMPT:
+        model = get_label_model()
+        model.learn(paper_title, paper_abstract, category)
+        if audit_category:
+            model.record_audit(audit_category, category)
+            metrics.inc('local_model_audits_total', result='agree' if audit_category == category else 'disagree')
+
+def log_gemini_error(client, message):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"{timestamp} - {message} (Key index: {client.index}).")
 
-            if gemini_output.lower() not in [label.lower() for label in LABELS + ["Other"]]:
-                print(f"Warning: Gemini returned unexpected label: '{gemini_output}'.")
-                return "Uncategorized"
-            return gemini_output
+def categorize_pdf_with_gemini(paper_title, paper_abstract, labels_prompt=GENERIC_LABELS_PROMPT):
+    """Categorizes a research paper using its title and abstract.
+       Each request goes to the API key with the most remaining quota; retries on rate limits and timeouts."""
+    if not paper_title and not paper_abstract:
+        return "No Text Extracted"
 
+    with metrics.timer('categorize_seconds', mode='single'):
+        cache_key, category = lookup_cached_category(paper_title, paper_abstract, labels_prompt)
+        if category:
+            return category
+        category, audit_category = local_category(paper_title, paper_abstract, labels_prompt)
+        if category:
+            return category
+        category = request_category(paper_title, paper_abstract, labels_prompt)
+        remember_category(cache_key, paper_title, paper_abstract, labels_prompt, category, audit_category)
+        return category
+
+def request_category(paper_title, paper_abstract, labels_prompt=GENERIC_LABELS_PROMPT):
+    prompt_content = build_categorization_prompt(paper_title, paper_abstract, labels_prompt)
+    tokens = estimate_tokens(prompt_content)
+    key_pool = get_gemini_key_pool()
+    max_attempts = key_pool.retry_policy.max_attempts
+
+    for attempt in range(1, max_attempts + 1):
+        client = key_pool.acquire(tokens)
+        try:
+            with metrics.in_flight('gemini_requests_in_flight'), metrics.timer('gemini_request_seconds', key=client.index):
+                response = client.generate_content(prompt_content)
+            client.breaker.record_success()
+            metrics.inc('gemini_requests_total', key=client.index, result='ok')
+            return parse_category(response.text.strip())
         except Exception as e:
-            error_str = str(e).lower()
-            if "429" in error_str:
-                delay = api_error_delay
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                key_index = GEMINI_API_KEYS.index(current_api_key) if current_api_key in GEMINI_API_KEYS else 'N/A'
-                print(f"{timestamp} - Gemini API error (Key index: {key_index}): 429 Rate Limit Exceeded (Attempt {api_keys_tried_count % max_retries_per_key + 1}/{max_retries_per_key}).")
-                api_keys_tried_count += 1
-                if api_keys_tried_count >= len(GEMINI_API_KEYS) * max_retries_per_key and not keys_exhausted_delay_occurred:
-                    print(f"{timestamp} - All keys rate limited. Waiting for {delay} seconds before retrying...")
-                    time.sleep(delay)
-                    keys_exhausted_delay_occurred = True
-                continue
-            elif "deadline" in error_str:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                key_index = GEMINI_API_KEYS.index(current_api_key) if current_api_key in GEMINI_API_KEYS else 'N/A'
-                print(f"{timestamp} - Gemini API Timeout (Key index: {key_index}).")
-                api_keys_tried_count += 1
-                continue
-            else:
-                print(f"Gemini API error: {e}")
+            delay = handle_gemini_error(key_pool, client, e, attempt)
+            if delay is None:
                 return "API Error"
+            time.sleep(delay)
 
-    timestamp_fail = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"{timestamp_fail} - Max API retries reached. Categorization failed.")
+    log_gemini_error(client, "Max API retries reached. Categorization failed")
     return "API Error (Retries Exhausted)"
 
-def save_category_to_csv_append(pdf_name, category, csv_filename, write_header=False):
-    """Appends a PDF's category to the CSV file. Writes header only if needed."""
-    file_exists = os.path.exists(csv_filename)
-    with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        if write_header or not file_exists:
-            print("DEBUG: Writing CSV header...")
-            csv_writer.writerow(['PDF Name', 'Category'])
-        print(f"DEBUG: Writing row: PDF Name='{pdf_name}', Category='{category}'")
-        csv_writer.writerow([pdf_name, category])
-    print(f"Saved category for '{pdf_name}' to {csv_filename}")
+async def generate_with_gemini_async(prompt_content, tokens, generation_config=None):
+    """Sends one prompt through the key pool with retries.
+       Returns (response text, None) on success or (None, error category) on failure."""
+    key_pool = get_gemini_key_pool()
+    max_attempts = key_pool.retry_policy.max_attempts
 
-# --- GUI Class Definition ---
+    for attempt in range(1, max_attempts + 1):
+        client = await key_pool.acquire_async(tokens)
+        try:
+            with metrics.in_flight('gemini_requests_in_flight'), metrics.timer('gemini_request_seconds', key=client.index):
+                response = await asyncio.to_thread(client.generate_content, prompt_content, generation_config)
+            client.breaker.record_success()
+            metrics.inc('gemini_requests_total', key=client.index, result='ok')
+            return response.text.strip(), None
+        except Exception as e:
+            delay = handle_gemini_error(key_pool, client, e, attempt)
+            if delay is None:
+                return None, "API Error"
+            await asyncio.sleep(delay)
 
-class PDFCategorizerGUI(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("PDF Categorizer")
-        # Increase width of the window (set width to 1200 pixels, height to 600 pixels)
-        self.geometry("1200x600")
-        self.configure(bg="#2C3E50")
+    log_gemini_error(client, "Max API retries reached. Categorization failed")
+    return None, "API Error (Retries Exhausted)"
 
-        self.pdf_folder = tk.StringVar(value=PDF_FOLDER_PATH)
-        self.metadata = {}  # Dictionary: {pdf_filename: category}
-        self.csv_header_written = False
-        # New variable to choose CSV mode: "append" or "new"
-        self.csv_mode = tk.StringVar(value="append")
-        # Entry variable for new CSV filename (only used if csv_mode=="new")
-        self.new_csv_filename = tk.StringVar(value="")
-
-        # Will store the CSV file name to use
-        self.current_csv_filename = CSV_OUTPUT_FILE
-
-        self.create_widgets()
-
-    def create_widgets(self):
-        # Top frame for folder selection and CSV mode options
-        top_frame = ttk.Frame(self, padding=10)
-        top_frame.pack(side=tk.TOP, fill=tk.X)
-
-        ttk.Label(top_frame, text="PDF Folder:", background="#2C3E50", foreground="#ECF0F1", font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
-        self.folder_entry = ttk.Entry(top_frame, textvariable=self.pdf_folder, width=60, font=("Helvetica", 12))
-        self.folder_entry.pack(side=tk.LEFT, padx=5)
-        ttk.Button(top_frame, text="Browse...", command=self.browse_folder, width=12).pack(side=tk.LEFT, padx=5)
-        ttk.Button(top_frame, text="Start Categorization", command=self.start_categorization, width=20).pack(side=tk.LEFT, padx=5)
-
-        csv_option_frame = ttk.Frame(self, padding=10)
-        csv_option_frame.pack(side=tk.TOP, fill=tk.X)
-        ttk.Label(csv_option_frame, text="CSV Mode:", background="#2C3E50", foreground="#ECF0F1", font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
-        ttk.Radiobutton(csv_option_frame, text="Append to Existing CSV", variable=self.csv_mode, value="append", command=self.toggle_csv_entry).pack(side=tk.LEFT, padx=5)
-        ttk.Radiobutton(csv_option_frame, text="Create New CSV", variable=self.csv_mode, value="new", command=self.toggle_csv_entry).pack(side=tk.LEFT, padx=5)
-        self.csv_entry = ttk.Entry(csv_option_frame, textvariable=self.new_csv_filename, width=40, font=("Helvetica", 12))
-        self.csv_entry.pack_forget()
-
-        # Progress bar
-        self.progress_var = tk.DoubleVar()
-        self.progress_bar = ttk.Progressbar(self, variable=self.progress_var, maximum=100)
-        self.progress_bar.pack(fill=tk.X, padx=10, pady=5)
-
-        tree_frame = ttk.Frame(self)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        columns = ("PDF Name", "Category")
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
-        for col in columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=300)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        # Log area
-        log_frame = ttk.LabelFrame(self, text="Log", padding=10)
-        log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        self.log_area = scrolledtext.ScrolledText(log_frame, height=10, wrap=tk.WORD, font=("Helvetica", 12))
-        self.log_area.pack(fill=tk.BOTH, expand=True)
-
-        self.style_widgets()
-
-    def toggle_csv_entry(self):
-        if self.csv_mode.get() == "new":
-            self.csv_entry.pack(side=tk.LEFT, padx=5)
-        else:
-            self.csv_entry.pack_forget()
-
-    def style_widgets(self):
-        style = ttk.Style()
-        style.theme_use("clam")
-
-        # Colors
-        primary = "#3498db"    
-        secondary = "#2980b9" 
-        bg_color = "#2C3E50"  
-        accent = "#e67e22"    
-        text_color = "#ECF0F1" 
-
-        style.configure("TLabel", background=bg_color, foreground=text_color, font=("Helvetica", 12))
-        style.configure("Header.TLabel", background=bg_color, foreground=primary, font=("Helvetica", 26, "bold"))
-
-        style.configure("TButton", background=primary, foreground="white", font=("Helvetica", 12, "bold"), padding=8)
-        style.map("TButton",
-                  background=[("active", secondary)],
-                  foreground=[("active", "white")])
-        style.configure("TEntry", fieldbackground="white", foreground="black", font=("Helvetica", 12))
-        style.configure("TCombobox", fieldbackground="white", foreground="black", font=("Helvetica", 12))
-
-    def browse_folder(self):
-        folder_selected = filedialog.askdirectory(initialdir=self.pdf_folder.get())
-        if folder_selected:
-            self.pdf_folder.set(folder_selected)
+async def categorize_pdf_with_gemini_async(paper_title, paper_abstract, labels_prompt=GENERIC_LABELS_PROMPT):
+    """Async variant of categorize_pdf_with_gemini. The blocking client call runs in a worker
+       thread, so many papers can be in flight while the key pool paces them to each key's quota."""
+    if not paper_title and not paper_abstract:
+        return "No Text Extracted"
 
-    def log(self, message):
-        timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S] ")
-        self.log_area.insert(tk.END, timestamp + message + "\n")
-        self.log_area.see(tk.END)
-
-    def get_csv_filename(self):
-        """Returns the CSV filename based on the CSV mode.
-           If 'append', returns the pre-configured CSV_OUTPUT_FILE.
-           If 'new', returns the name entered by the user or a timestamped default."""
-        if self.csv_mode.get() == "append":
-            return CSV_OUTPUT_FILE
-        else:
-            new_name = self.new_csv_filename.get().strip()
-            if new_name:
-                # Ensure the new file name ends with .csv
-                if not new_name.lower().endswith(".csv"):
-                    new_name += ".csv"
-                return new_name
-            else:
-                base, ext = os.path.splitext(CSV_OUTPUT_FILE)
-                new_filename = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
-                return new_filename
-
-    def start_categorization(self):
-        folder = self.pdf_folder.get()
-        if not os.path.isdir(folder):
-            messagebox.showerror("Error", "Please select a valid PDF folder.")
-            return
+    with metrics.timer('categorize_seconds', mode='single'):
+        cache_key, category = lookup_cached_category(paper_title, paper_abstract, labels_prompt)
+        if category:
+            return category
+        category, audit_category = local_category(paper_title, paper_abstract, labels_prompt)
+        if category:
+            return category
+        category = await request_category_async(paper_title, paper_abstract, labels_prompt)
+        remember_category(cache_key, paper_title, paper_abstract, labels_prompt, category, audit_category)
+        return category
+
+async def request_category_async(paper_title, paper_abstract, labels_prompt=GENERIC_LABELS_PROMPT):
+    prompt_content = build_categorization_prompt(paper_title, paper_abstract, labels_prompt)
+    gemini_output, error = await generate_with_gemini_async(prompt_content, estimate_tokens(prompt_content))
+    return error or parse_category(gemini_output)
+
+def build_batch_categorization_prompt(papers, labels_prompt=GENERIC_LABELS_PROMPT):
+    """papers is a list of (id, title, abstract)."""
+    paper_blocks = "\n".join(
+        f"""
+Paper ID: {paper_id}
+Title: {paper_title}
+Abstract: {paper_abstract}
+""" for paper_id, paper_title, paper_abstract in papers)
+    return f"""
+Instructions: You are an expert research paper classifier.
+You are provided with several research papers, each with an ID, a title and an abstract.
+Based on the content, classify each paper into one of the following categories:
+{labels_prompt}.
+If a paper does not clearly belong to any of these categories, use "Other".
+IMPORTANT: Respond ONLY with a JSON array containing one object per paper, in the form
+[{{"id": "<Paper ID>", "category": "<category name>"}}]
 
-        self.current_csv_filename = self.get_csv_filename()
-        self.csv_header_written = False
+Papers:
+{paper_blocks}
+"""
 
-        self.tree.delete(*self.tree.get_children())
-        self.log_area.delete("1.0", tk.END)
-        self.metadata = {}
-        self.progress_var.set(0)
+def parse_batch_categories(gemini_output, paper_ids):
+    """Returns {paper_id: label} for every well-formed result with a known label."""
+    canonical_labels = {label.lower(): label for label in LABELS + ["Other"]}
+    try:
+        results = json.loads(gemini_output)
+    except ValueError:
+        print(f"Warning: Gemini returned invalid JSON for a batch of {len(paper_ids)} papers.")
+        return {}
+    if not isinstance(results, list):
+        return {}
+
+    categories = {}
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        paper_id = str(result.get("id", ""))
+        label = canonical_labels.get(str(result.get("category", "")).strip().lower())
+        if paper_id in paper_ids and label:
+            categories[paper_id] = label
+    return categories
+
+async def categorize_batch_with_gemini_async(papers, labels_prompt=GENERIC_LABELS_PROMPT):
+    """Categorizes several papers with a single request. papers is a list of (title, abstract);
+       returns their categories in the same order. Cached papers and those the local model is
+       confident about are not sent, and papers missing from the reply or given an unknown
+       label are retried individually."""
+    batch = [(str(index), title, abstract) for index, (title, abstract) in enumerate(papers, start=1)]
+    categories = {}
+    cache_keys = {}
+    audit_categories = {}
+    for paper_id, title, abstract in batch:
+        cache_keys[paper_id], cached = lookup_cached_category(title, abstract, labels_prompt)
+        if not cached:
+            cached, audit_categories[paper_id] = local_category(title, abstract, labels_prompt)
+        if cached:
+            categories[paper_id] = cached
+    uncached = [paper for paper in batch if paper[0] not in categories]
+
+    if len(uncached) > 1:
+        paper_ids = {paper_id for paper_id, _, _ in uncached}
+        prompt_content = build_batch_categorization_prompt(uncached, labels_prompt)
+        tokens = estimate_tokens(prompt_content) + 16 * len(uncached)
+        gemini_output, error = await generate_with_gemini_async(prompt_content, tokens,
+                                                                generation_config={"response_mime_type": "application/json"})
+        if not error:
+            categories.update(parse_batch_categories(gemini_output, paper_ids))
+
+    failed = [(paper_id, title, abstract) for paper_id, title, abstract in uncached if paper_id not in categories]
+    if failed:
+        if len(uncached) > 1:
+            metrics.inc('batch_papers_retried_total', len(failed))
+        retried = await asyncio.gather(*(request_category_async(title, abstract, labels_prompt)
+                                         for _, title, abstract in failed))
+        categories.update({paper_id: category for (paper_id, _, _), category in zip(failed, retried)})
+    for paper_id, title, abstract in uncached:
+        remember_category(cache_keys[paper_id], title, abstract, labels_prompt, categories[paper_id],
+                          audit_categories.get(paper_id))
+    return [categories[paper_id] for paper_id, _, _ in batch]
+
+async def categorize_papers_async(papers, labels_prompt=GENERIC_LABELS_PROMPT):
+    """Categories for a list of (title, abstract): a single paper gets the single-paper prompt,
+       several share one batch request."""
+    if len(papers) == 1:
+        return [await categorize_pdf_with_gemini_async(*papers[0], labels_prompt)]
+    with metrics.timer('categorize_seconds', mode='batch'):
+        return await categorize_batch_with_gemini_async(papers, labels_prompt)
+
+def handle_gemini_error(key_pool, client, error, attempt):
+    """Records a failed request. Returns the seconds to wait before the next attempt,
+       or None if the error is permanent and the request should not be retried."""
+    error_class = classify_exception(error)
+    metrics.inc('gemini_requests_total', key=client.index, result=error_class)
+    if error_class == PERMANENT:
+        print(f"Gemini API error: {error}")
+        return None
+    max_attempts = key_pool.retry_policy.max_attempts
+    metrics.inc('gemini_retries_total', key=client.index)
+    retry_after = retry_after_from_error(error)
+    if error_class == QUOTA:
+        # No sleep here: the next attempt goes to another key, and acquire() waits
+        # only if every key's breaker is open
+        client.breaker.trip(retry_after)
+        log_gemini_error(client, f"Gemini API error: 429 Rate Limit Exceeded (Attempt {attempt}/{max_attempts})")
+        return 0.0
+    log_gemini_error(client, f"Gemini API transient error: {error} (Attempt {attempt}/{max_attempts})")
+    if attempt >= max_attempts:
+        return 0.0
+    return key_pool.retry_policy.delay(attempt, retry_after)
+
+def truncate_partial_line(csv_filename):
+    """Drops a trailing line left half-written by a crash, so appended rows start on a clean line."""
+    if not os.path.exists(csv_filename):
+        return
+    with open(csv_filename, 'rb+') as csvfile:
+        size = csvfile.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        csvfile.seek(size - 1)
+        if csvfile.read(1) == b"\n":
+            return
+        position = size
+        while position > 0:
+            chunk_start = max(0, position - 65536)
+            csvfile.seek(chunk_start)
+            chunk = csvfile.read(position - chunk_start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                csvfile.truncate(chunk_start + newline + 1)
+                return
+            position = chunk_start
+        csvfile.truncate(0)
+
+class CategoryCSVWriter:
+    """Long-lived writer for the output CSV. Rows are buffered and appended in batches, once
+       CSV_FLUSH_ROWS rows are waiting or every CSV_FLUSH_SECONDS, and on close/SIGINT.
+       Each flush is a single write followed by fsync, and a torn last line from an earlier
+       crash is cut off before the first append. The same batch is recorded in the metadata
+       store, which is what resumed runs read."""
+    def __init__(self, csv_filename, flush_rows=None, flush_interval=None):
+        self.csv_filename = csv_filename
+        self.flush_rows = flush_rows or CSV_FLUSH_ROWS
+        self.flush_interval = flush_interval or CSV_FLUSH_SECONDS
+        self.rows = []
+        self.lock = threading.Lock()
+        truncate_partial_line(csv_filename)
+        self.header_written = os.path.exists(csv_filename) and os.path.getsize(csv_filename) > 0
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self.flush_periodically, daemon=True)
+        self.flusher.start()
+        open_csv_writers.add(self)
+
+    def add(self, pdf_name, category):
+        with self.lock:
+            self.rows.append([pdf_name, category])
+            if len(self.rows) >= self.flush_rows:
+                self.flush_locked()
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        if not self.rows:
+            return
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        if not self.header_written:
+            csv_writer.writerow(['PDF Name', 'Category'])
+        csv_writer.writerows(self.rows)
+        with open(self.csv_filename, 'ab') as csvfile:
+            csvfile.write(buffer.getvalue().encode('utf-8'))
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+        get_metadata_store().record_categories(self.csv_filename, self.rows)
+        self.header_written = True
+        self.rows = []
+
+    def flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.closed.set()
+        self.flush()
+        open_csv_writers.discard(self)
+
+def flush_open_csv_writers():
+    for writer in list(open_csv_writers):
+        writer.flush()
+
+def load_category_index(csv_filename):
+    """{pdf_name: category} recorded for an output CSV. A CSV the metadata store has not seen
+       yet (written by an older version or another tool) is imported on first use."""
+    store = get_metadata_store()
+    if not store.has_categories(csv_filename) and os.path.exists(csv_filename):
+        if store.import_category_csv(csv_filename) is None:
+            print(f"Warning: {csv_filename} is not a categorization CSV; nothing to resume from.")
+    return store.categories(csv_filename)
+
+def compact_category_csv(csv_filename):
+    """Rewrites the output CSV with one row per PDF (its latest category), replacing the
+       rows left behind by retried PDFs. The file is swapped in atomically."""
+    if load_category_index(csv_filename):
+        get_metadata_store().export_category_csv(csv_filename)
+
+class Categorizer:
+    """Categorizes the PDFs of a folder, or the papers of the metadata store, into an output CSV
+       without a GUI; PDFCategorizerGUI (annotator_gui.py) and cli.py drive it. The output
+       defaults to CSV_OUTPUT_FILE, read when the categorizer is created. Each result goes to
+       on_result(pdf name, category) and progress in percent to on_progress."""
+    def __init__(self, output=None, extraction_workers=None, on_log=None, on_result=None, on_progress=None):
+        self.output = output or CSV_OUTPUT_FILE
+        self.extraction_workers = extraction_workers or EXTRACTION_WORKERS
+        self.on_log = on_log or print
+        self.on_result = on_result or (lambda pdf_name, category: None)
+        self.on_progress = on_progress or (lambda percent: None)
+        self.metadata = {}  # Dictionary: {pdf_filename: category}
 
-        threading.Thread(target=self.process_folder, args=(folder,), daemon=True).start()
+    def log(self, message):
+        self.on_log(message)
 
-    def process_folder(self, folder_path):
+    def process_folder(self, folder_path, resume=False):
+        """Categorizes every PDF in `folder_path`; with resume, those without a category in
+           the output yet. PDFs the scraper downloaded are sent with their scraped title, others
+           with their file name. Returns {pdf name: category} of this run."""
         pdf_files = [f for f in os.listdir(folder_path) if f.lower().endswith(".pdf")]
-        total = len(pdf_files)
-        if total == 0:
+        if not pdf_files:
             self.log("No PDF files found in the selected folder.")
-            return
-
-        for idx, filename in enumerate(pdf_files, start=1):
-            pdf_path = os.path.join(folder_path, filename)
-            self.log(f"Processing: {filename}")
-            abstract = extract_abstract_from_pdf(pdf_path)
-            if abstract:
-                title = os.path.splitext(filename)[0]
-                category = categorize_pdf_with_gemini(title, abstract)
-            else:
-                category = "Text Extraction Failed"
-            self.metadata[filename] = category
-            self.log(f"  - Category: {category}")
-            # Append result to CSV using the current CSV filename
-            save_category_to_csv_append(filename, category, self.current_csv_filename, write_header=not self.csv_header_written)
-            if not self.csv_header_written:
-                self.csv_header_written = True
-            self.tree.insert("", tk.END, values=(filename, category))
-            progress_percent = (idx / total) * 100
-            self.progress_var.set(progress_percent)
-            time.sleep(1) 
-
+            return {}
+
+        if resume:
+            pdf_files = self.skip_categorized(pdf_files)
+            if not pdf_files:
+                self.log("Categorization complete.")
+                return {}
+
+        titles = get_metadata_store().titles_by_pdf_name()
+        return self.run_categorization(self.extract_abstracts(folder_path, pdf_files, titles), len(pdf_files), resume)
+
+    def process_papers(self, papers, download_dir, resume=False):
+        """Categorizes scraped papers handed over in memory, e.g. the scraper's metadata_list:
+           Gemini gets their real titles, a paper's scraped abstract is used as is, and the
+           others are read from their PDF in `download_dir`. No folder is listed; papers with
+           neither an abstract nor a downloaded PDF are skipped. Returns {pdf name: category}
+           of this run."""
+        duplicates = get_metadata_store().duplicates()
+        by_name = {}
+        for paper in papers:
+            name = pdf_filename(paper)
+            # Duplicate listings are categorized through their canonical paper
+            if name not in duplicates:
+                by_name.setdefault(name, paper)
+        names = list(by_name)
+        if resume:
+            names = self.skip_categorized(names)
+        with_abstract = [name for name in names if by_name[name].get('abstract')]
+        to_extract = [name for name in names
+                      if not by_name[name].get('abstract') and os.path.exists(os.path.join(download_dir, name))]
+        skipped = len(names) - len(with_abstract) - len(to_extract)
+        if skipped:
+            self.log(f"{skipped} papers have neither an abstract nor a PDF in {download_dir}; download them first.")
+        total = len(with_abstract) + len(to_extract)
+        if not total:
+            self.log("Categorization complete.")
+            return {}
+
+        async def paper_abstracts():
+            for name in with_abstract:
+                yield name, by_name[name]['title'], by_name[name]['abstract']
+            if to_extract:
+                titles = {name: by_name[name]['title'] for name in to_extract}
+                async for item in self.extract_abstracts(download_dir, to_extract, titles):
+                    yield item
+
+        return self.run_categorization(paper_abstracts(), total, resume)
+
+    def process_metadata(self, metadata_csv=None, resume=False):
+        """Categorizes straight from scraped metadata that carries abstracts, without any PDFs.
+           Papers come from the metadata store (after importing `metadata_csv`, if given).
+           Rows are recorded under the PDF name the scraper downloads them to, so results
+           line up with PDF-based runs."""
+        store = get_metadata_store()
+        if metadata_csv:
+            self.log(f"Imported {store.import_metadata_csv(metadata_csv)} papers from {metadata_csv}.")
+
+        with_abstract = store.papers(with_abstract=True)
+        without_abstract = store.paper_count() - len(with_abstract)
+        if without_abstract:
+            self.log(f"{without_abstract} papers have no abstract in the metadata; categorize their PDFs instead.")
+        if not with_abstract:
+            self.log("No papers with abstracts found in the metadata store.")
+            return {}
+
+        if resume:
+            # The store joins papers against this CSV's categories, no file scan needed
+            self.metadata = load_category_index(self.output)
+            remaining = store.uncategorized_papers(self.output, RETRY_CATEGORIES)
+            self.log(f"Resuming: {len(with_abstract) - len(remaining)} papers already categorized, {len(remaining)} to process.")
+            with_abstract = remaining
+            if not with_abstract:
+                self.log("Categorization complete.")
+                return {}
+
+        # Duplicate listings are categorized through their canonical paper
+        duplicates = store.duplicates()
+        papers = {pdf_filename(paper): paper for paper in with_abstract if pdf_filename(paper) not in duplicates}
+
+        async def metadata_abstracts():
+            for name, paper in papers.items():
+                yield name, paper['title'], paper['abstract']
+
+        return self.run_categorization(metadata_abstracts(), len(papers), resume)
+
+    def run_categorization(self, abstracts, total, resume):
+        # Fail before any PDF is read rather than at the first request
+        get_gemini_key_pool()
+        metrics.reset()
+        # Duplicates the scraper found get their canonical paper's category; copies with the
+        # same abstract (e.g. re-uploaded PDFs) are collapsed as they are extracted
+        self.known_duplicates = get_metadata_store().duplicates_by_canonical()
+        self.abstract_index = DuplicateIndex()
+        self.duplicate_waiters = {}
+        self.run_categories = {}
+        self.csv_writer = CategoryCSVWriter(self.output)
+        try:
+            asyncio.run(self.categorize_stream_async(abstracts, total))
+        finally:
+            self.csv_writer.close()
+        if resume:
+            compact_category_csv(self.output)
+        self.log(metrics.summary())
         self.log("Categorization complete.")
+        return self.run_categories
+
+    def skip_categorized(self, pdf_names):
+        # Every result is appended to the CSV as soon as it is known, so the
+        # output file itself is the checkpoint of the previous run
+        self.metadata = load_category_index(self.output)
+        done = {name for name, category in self.metadata.items() if category not in RETRY_CATEGORIES}
+        remaining = [name for name in pdf_names if name not in done]
+        self.log(f"Resuming: {len(pdf_names) - len(remaining)} PDFs already categorized, {len(remaining)} to process.")
+        return remaining
+
+    async def extract_abstracts(self, folder_path, pdf_files, titles=None):
+        """Yields (pdf name, title, abstract or None) as worker processes finish extracting.
+           The title is taken from `titles` ({pdf name: title}), else from the file name
+           (see title_from_pdf_name)."""
+        titles = titles or {}
+        loop = asyncio.get_running_loop()
+        workers = self.extraction_workers
+
+        def submit(executor, filename):
+            # run_in_executor hands the PDF to the pool at once, so PDFs are queued in the
+            # order submit is called, whatever order the results are awaited in
+            return extract(filename, loop.run_in_executor(executor, extract_abstract_timed,
+                                                          os.path.join(folder_path, filename)))
+
+        async def extract(filename, extraction):
+            try:
+                abstract, seconds = await extraction
+                metrics.observe('extract_abstract_seconds', seconds)
+                return filename, abstract, None
+            except Exception as e:
+                return filename, None, e
+            finally:
+                metrics.add_gauge('extraction_queued', -1)
+
+        def finished(filename, abstract, error):
+            if isinstance(error, BrokenProcessPool):
+                self.log(f"Extraction worker crashed on {filename}")
+            elif error:
+                self.log(f"Extraction failed for {filename}: {error}")
+            if error:
+                metrics.inc('extraction_failures_total')
+            return filename, titles.get(filename) or title_from_pdf_name(filename), abstract
+
+        self.log(f"Extracting abstracts with {workers} worker processes...")
+        pending = pdf_files
+        while pending:
+            crashed = []
+            metrics.add_gauge('extraction_queued', len(pending))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for next_extracted in asyncio.as_completed([submit(executor, filename) for filename in pending]):
+                    filename, abstract, error = await next_extracted
+                    if isinstance(error, BrokenProcessPool):
+                        crashed.append(filename)
+                        continue
+                    yield finished(filename, abstract, error)
+            if not crashed:
+                break
+            # A crashing worker takes the whole pool down with it. PDFs were submitted in the
+            # order of `pending` and the pool hands them to its workers in that order, holding
+            # at most 2 * workers + 1 at a time, so only the first unfinished ones can have
+            # caused the crash: retry those one at a time, each in a pool of its own, so only
+            # the offending PDF fails, and the rest together in a new pool
+            order = {filename: index for index, filename in enumerate(pending)}
+            crashed.sort(key=order.get)
+            suspects = crashed[:2 * workers + 1]
+            self.log(f"Extraction worker pool crashed; retrying {len(suspects)} PDFs one at a time "
+                     f"and {len(crashed) - len(suspects)} in a new pool.")
+            for filename in suspects:
+                metrics.add_gauge('extraction_queued', 1)
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    yield finished(*await submit(executor, filename))
+            pending = crashed[len(suspects):]
+
+    async def categorize_stream_async(self, abstracts, total):
+        """Categorizes (pdf name, title, abstract) items from an async iterator concurrently, in
+           batches of CATEGORIZATION_BATCH_SIZE, in the order the items arrive."""
+        request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        categorize_tasks = []
+        self.processed_count = 0
+
+        async def categorize(batch):
+            papers = [(title, abstract) for _, title, abstract in batch]
+            async with request_slots:
+                metrics.add_gauge('categorize_batches_queued', -1)
+                with metrics.in_flight('categorize_batches_in_flight'):
+                    categories = await categorize_papers_async(papers)
+            for (filename, _, _), category in zip(batch, categories):
+                self.record_category(filename, category, total)
+
+        def dispatch(batch):
+            metrics.add_gauge('categorize_batches_queued', 1)
+            categorize_tasks.append(asyncio.create_task(categorize(batch)))
+
+        batch = []
+        async for filename, title, abstract in abstracts:
+            self.log(f"Processing: {filename}")
+            if not abstract:
+                self.record_category(filename, "Text Extraction Failed", total)
+                continue
+            canonical = filename
+            if abstract != ABSTRACT_NOT_FOUND and is_comparable_abstract(abstract):
+                canonical, similarity = self.abstract_index.add(filename, text_shingles(abstract),
+                                                                text_fingerprint(abstract))
+            if canonical != filename:
+                self.log(f"  {filename} duplicates {canonical} ({similarity:.0%} similar)")
+                metrics.inc('duplicates_reused_total')
+                if canonical in self.run_categories:
+                    self.record_category(filename, self.run_categories[canonical], total)
+                else:
+                    self.duplicate_waiters.setdefault(canonical, []).append(filename)
+                continue
+            batch.append((filename, title, abstract))
+            if len(batch) >= CATEGORIZATION_BATCH_SIZE:
+                dispatch(batch)
+                batch = []
+
+        if batch:
+            dispatch(batch)
+        await asyncio.gather(*categorize_tasks)
+        if USE_CATEGORY_CACHE:
+            self.log(f"Category cache: {get_category_cache().stats()}")
+        if USE_LOCAL_MODEL:
+            self.log(get_label_model().report())
+
+    def record_category(self, filename, category, total):
+        self.metadata[filename] = category
+        self.run_categories[filename] = category
+        self.log(f"  - {filename}: {category}")
+        self.csv_writer.add(filename, category)
+        metrics.inc('papers_categorized_total', category=category)
+        self.on_result(filename, category)
+        self.processed_count += 1
+        progress_percent = (self.processed_count / total) * 100
+        self.on_progress(progress_percent)
+        for duplicate in self.duplicate_waiters.pop(filename, []):
+            self.record_category(duplicate, category, total)
+        # Listings the scraper collapsed into this paper are not part of `total`
+        for duplicate in self.known_duplicates.get(filename, []):
+            self.metadata[duplicate] = category
+            self.csv_writer.add(duplicate, category)
+            self.on_result(duplicate, category)
+            metrics.inc('duplicates_reused_total')
 
 def signal_handler(sig, frame):
     print("\nScript interrupted by user. Exiting...")
+    flush_open_csv_writers()
     sys.exit(0)
 
+atexit.register(flush_open_csv_writers)
+
 if __name__ == "__main__":
-    signal.signal(signal.SIGINT, signal_handler)
-    app = PDFCategorizerGUI()
-    app.mainloop()
+    # The GUI lives in its own module so that importing this one does not need tkinter
+    from annotator_gui import main
+    main()
@@ -0,0 +1,93 @@
+"""Compares full-document abstract extraction with the lazy first-pages extractor.
+
+Usage:
+    python benchmarks/bench_abstract_extraction.py <folder_with_pdfs> [--max-pages N]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyPDF2 import PdfReader
+from auto_annotator import extract_abstract_from_pdf
+
+
+def extract_abstract_full_text(pdf_path):
+    """The previous extractor: parses every page, then searches the whole text."""
+    text = ""
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            reader = PdfReader(pdf_file)
+            for page in reader.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + "\n"
+    except Exception as e:
+        print(f"Error reading PDF {pdf_path}: {e}")
+        return None
+
+    abstract = ""
+    if "abstract" in text.lower():
+        capturing = False
+        for line in text.split("\n"):
+            if "abstract" in line.lower():
+                capturing = True
+                continue
+            if capturing:
+                if line.strip() == "":
+                    break
+                abstract += line.strip() + " "
+    return abstract.strip() if abstract else "Abstract Not Found"
+
+
+def measure(extractor, pdf_path, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = extractor(pdf_path, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder")
+    parser.add_argument("--max-pages", type=int, default=2)
+    args = parser.parse_args()
+
+    pdf_files = sorted(f for f in os.listdir(args.folder) if f.lower().endswith(".pdf"))
+    if not pdf_files:
+        print(f"No PDF files found in {args.folder}")
+        return 1
+
+    totals = {"full_time": 0.0, "lazy_time": 0.0, "full_peak": 0, "lazy_peak": 0, "found": 0}
+    print(f"{'PDF':50} {'full ms':>9} {'lazy ms':>9} {'full KB':>9} {'lazy KB':>9}")
+    for filename in pdf_files:
+        pdf_path = os.path.join(args.folder, filename)
+        _, full_time, full_peak = measure(extract_abstract_full_text, pdf_path)
+        lazy_result, lazy_time, lazy_peak = measure(extract_abstract_from_pdf, pdf_path, max_pages=args.max_pages)
+        totals["full_time"] += full_time
+        totals["lazy_time"] += lazy_time
+        totals["full_peak"] += full_peak
+        totals["lazy_peak"] += lazy_peak
+        totals["found"] += lazy_result not in (None, "Abstract Not Found")
+        print(f"{filename[:50]:50} {full_time * 1000:9.1f} {lazy_time * 1000:9.1f} "
+              f"{full_peak / 1024:9.0f} {lazy_peak / 1024:9.0f}")
+
+    count = len(pdf_files)
+    saved_time = (totals["full_time"] - totals["lazy_time"]) / count
+    saved_peak = (totals["full_peak"] - totals["lazy_peak"]) / count
+    print()
+    print(f"PDFs: {count}, abstracts found (lazy): {totals['found']}")
+    print(f"Mean time per PDF: full {totals['full_time'] / count * 1000:.1f} ms, "
+          f"lazy {totals['lazy_time'] / count * 1000:.1f} ms, saved {saved_time * 1000:.1f} ms")
+    print(f"Mean peak memory per PDF: full {totals['full_peak'] / count / 1024:.0f} KB, "
+          f"lazy {totals['lazy_peak'] / count / 1024:.0f} KB, saved {saved_peak / 1024:.0f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Compares the proceedings index-page parsers on saved pages and checks they agree.
+
+Usage:
+    python benchmarks/bench_index_parsers.py <index_page.html>... [--repeat N]
+
+Pages can be saved from a browser or taken from the scraper's .http_cache (*.body files).
+The year is read from a 4-digit number in the file name, or from the .json sidecar's URL.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from page_parsers import INDEX_PARSERS
+
+
+def page_year(path):
+    meta_path = os.path.splitext(path)[0] + ".json"
+    name = os.path.basename(path)
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            name = json.load(f).get('url', name)
+    match = re.search(r"(19|20)\d\d", name)
+    return int(match.group(0)) if match else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    totals = {backend: 0.0 for backend in INDEX_PARSERS}
+    papers = 0
+    print(f"{'page':40} {'papers':>7} " + " ".join(f"{backend + ' ms':>15}" for backend in INDEX_PARSERS))
+    for path in args.pages:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        year = page_year(path)
+        base_url = f"https://proceedings.neurips.cc/paper/{year}"
+        pdf_base = f"{base_url}/file"
+
+        results = {}
+        timings = {}
+        for backend, parse in INDEX_PARSERS.items():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results[backend] = parse(html, year, base_url, pdf_base)
+            timings[backend] = (time.perf_counter() - start) / args.repeat
+            totals[backend] += timings[backend]
+
+        reference = results['html.parser']
+        for backend, records in results.items():
+            assert records == reference, f"{backend} disagrees with html.parser on {path}"
+        papers += len(reference)
+        print(f"{os.path.basename(path)[:40]:40} {len(reference):7} "
+              + " ".join(f"{timings[backend] * 1000:15.1f}" for backend in INDEX_PARSERS))
+
+    print()
+    print(f"Pages: {len(args.pages)}, papers: {papers}, all backends produced identical records")
+    for backend, total in totals.items():
+        rate = papers / total if total else 0.0
+        speedup = totals['html.parser'] / total if total else 0.0
+        print(f"{backend:12} {total * 1000:9.1f} ms total, {rate:9.0f} papers/s, {speedup:.1f}x html.parser")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Replays Gemini-labelled papers through a fresh local label model and reports how many calls it saves.
+
+Usage:
+    python benchmarks/bench_label_model.py [--examples label_model.sqlite3] [--metadata python_metadata.sqlite3]
+    python benchmarks/bench_label_model.py --synthetic 6000
+
+Papers are replayed in the order they were labelled, as in a real run: the model answers a
+paper when it clears its calibrated threshold; otherwise the paper counts as a Gemini call and
+its label is learned. Like the annotator, a sample (--audit-rate) of the papers the model is
+confident about still goes to Gemini, which keeps the held-out set growing. Reported per
+block of papers and overall: the share answered locally (Gemini calls saved) and how often
+those local answers agree with Gemini's label.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from label_model import LabelModel
+
+LABELS = ["Machine Learning", "Deep Learning", "Computer Vision", "Natural Language Processing",
+          "Reinforcement Learning", "Optimization", "Data Science", "Artificial Intelligence", "Robotics"]
+# The annotator's model also learns Gemini's "Other" answers
+MODEL_LABELS = LABELS + ["Other"]
+
+
+def stored_examples(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT title, abstract, category FROM examples ORDER BY rowid").fetchall()
+
+
+def metadata_examples(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("""
+            SELECT p.title, p.abstract, c.category FROM categories c JOIN papers p ON p.pdf_name = c.pdf_name
+            WHERE p.abstract != '' ORDER BY c.updated_at""").fetchall()
+
+
+def synthetic_examples(count, seed):
+    """Papers whose words mostly come from their label's vocabulary, with shared filler words
+       and a fraction of ambiguous papers drawn from two labels."""
+    rng = random.Random(seed)
+    common = [f"common{index}" for index in range(400)]
+    vocabularies = {label: [f"{label.split()[0].lower()}{index}" for index in range(60)] for label in LABELS}
+    examples = []
+    for _ in range(count):
+        label = rng.choice(LABELS)
+        other = rng.choice(LABELS)
+        mix = 0.5 if rng.random() < 0.15 else 0.9
+        def word():
+            if rng.random() < 0.5:
+                return rng.choice(common)
+            return rng.choice(vocabularies[label] if rng.random() < mix else vocabularies[other])
+        examples.append((" ".join(word() for _ in range(8)), " ".join(word() for _ in range(150)), label))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--examples", help="label_model.sqlite3 written by the annotator")
+    parser.add_argument("--metadata", help="python_metadata.sqlite3 with abstracts and categories")
+    parser.add_argument("--synthetic", type=int, help="generate this many synthetic papers instead")
+    parser.add_argument("--target-agreement", type=float, default=0.95)
+    parser.add_argument("--min-examples", type=int, default=500)
+    parser.add_argument("--audit-rate", type=float, default=0.05)
+    parser.add_argument("--block", type=int, default=1000, help="papers per reported block")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        examples = synthetic_examples(args.synthetic, args.seed)
+    elif args.examples:
+        examples = stored_examples(args.examples)
+    elif args.metadata:
+        examples = metadata_examples(args.metadata)
+    else:
+        parser.error("give --examples, --metadata or --synthetic")
+    examples = [example for example in examples if example[2] in MODEL_LABELS]
+    print(f"Replaying {len(examples)} labelled papers (target agreement {args.target_agreement:.0%}).")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        model = LabelModel(os.path.join(workdir, "label_model.sqlite3"), MODEL_LABELS,
+                           args.target_agreement, args.min_examples)
+        audits = random.Random(args.seed)
+        local = agreed = 0
+        block_local = block_agreed = 0
+        start = time.perf_counter()
+        for count, (title, abstract, category) in enumerate(examples, start=1):
+            predicted = model.classify(title, abstract)
+            if predicted is not None and audits.random() < args.audit_rate:
+                model.record_audit(predicted, category)
+                predicted = None
+            if predicted is None:
+                model.learn(title, abstract, category)
+            else:
+                local += 1
+                block_local += 1
+                agreed += predicted == category
+                block_agreed += predicted == category
+            if count % args.block == 0 or count == len(examples):
+                size = (count - 1) % args.block + 1
+                agreement = f"{block_agreed / block_local:.1%}" if block_local else "-"
+                print(f"  papers {count - size + 1:>6}-{count:<6} answered locally {block_local / size:6.1%}, "
+                      f"agreement {agreement}")
+                block_local = block_agreed = 0
+        elapsed = time.perf_counter() - start
+
+        print(f"Gemini calls saved: {local}/{len(examples)} ({local / max(len(examples), 1):.1%})")
+        if local:
+            print(f"Agreement of local answers with Gemini: {agreed / local:.1%}")
+        print(f"Model time: {elapsed / max(len(examples), 1) * 1000:.2f} ms per paper")
+        print(model.report())
+        model.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
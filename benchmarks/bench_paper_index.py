@@ -0,0 +1,73 @@
+"""Times the scraper's search index: building it and answering a query per keystroke.
+
+Usage:
+    python benchmarks/bench_paper_index.py [--papers 50000] [--query "reinforcement learning"]
+
+Papers are synthetic, with titles and author lists drawn from a Zipf-like vocabulary, so
+common words match large parts of the corpus as they do in the real proceedings. Every
+prefix of the query is searched as the search bar does while it is typed, alone and
+combined with a year facet.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from paper_index import PaperIndex
+
+COMMON_WORDS = ["learning", "neural", "networks", "deep", "reinforcement", "graph", "models", "optimization",
+                "bayesian", "inference", "adversarial", "robust", "efficient", "generative", "language",
+                "vision", "policy", "gradient", "stochastic", "transformers", "attention", "kernel"]
+
+
+def synthetic_papers(count, seed):
+    rng = random.Random(seed)
+    vocabulary = COMMON_WORDS + [f"term{index}" for index in range(20000)]
+    # Rank-based weights: the common words dominate, the long tail is rare
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    surnames = [f"surname{index}" for index in range(30000)]
+    papers = []
+    for index in range(count):
+        title = " ".join(rng.choices(vocabulary, weights, k=rng.randint(5, 12)))
+        authors = ", ".join(f"First {rng.choice(surnames)}" for _ in range(rng.randint(1, 6)))
+        papers.append({'title': title.capitalize(), 'authors': authors, 'year': str(1990 + index % 35),
+                       'pdf_link': f"https://example.org/{index}.pdf"})
+    return papers
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=50000)
+    parser.add_argument("--query", default="reinforcement learning policy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    papers = synthetic_papers(args.papers, args.seed)
+    start = time.perf_counter()
+    index = PaperIndex(papers)
+    index.search("warm")
+    print(f"Built index over {len(index)} papers ({len(index.postings)} words) in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for year in (None, "2015"):
+        timings = []
+        for length in range(1, len(args.query) + 1):
+            prefix = args.query[:length]
+            start = time.perf_counter()
+            ids = index.search(prefix, year=year)
+            timings.append((time.perf_counter() - start) * 1000)
+            print(f"  {prefix!r:<{len(args.query) + 3}} year={year or 'all':<4} {len(ids):>6} papers {timings[-1]:7.2f} ms")
+        print(f"Per keystroke{' with year facet' if year else ''}: p50 {percentile(timings, 0.5):.2f} ms, "
+              f"p99 {percentile(timings, 0.99):.2f} ms, max {max(timings):.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
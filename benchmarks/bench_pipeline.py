@@ -0,0 +1,226 @@
+"""Runs scrape, download and categorize end to end against local stand-ins and reports JSON.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--years 2019-2020] [--papers-per-year 200] [--pipeline] [--output run.json]
+
+Nothing leaves the machine: the proceedings site is benchmarks/mock_services.MockNeurIPSServer
+and every Gemini key gets a FakeGenerativeModel. Each stage reports papers/s and p50/p99
+latency (one index page per year for scrape, one PDF for download, one Gemini request for
+categorize), and the run reports peak RSS of this process and of the extraction workers.
+With --pipeline, download, extraction and categorization run as one streaming stage (the
+scraper's Download + Categorize) and the report adds when the first paper was categorized.
+Compare the JSON of two runs to spot regressions.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Application prints go to stderr so stdout carries only the JSON report
+with contextlib.redirect_stdout(sys.stderr):
+    import auto_annotator
+    import scraper
+from mock_services import FakeGeminiBackend, MockNeurIPSServer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class HeadlessScraper(scraper.PaperScraper):
+    """PaperScraper timing each year and each PDF."""
+    def __init__(self, start_year, end_year, download_dir, concurrency, fetch_abstracts, verbose):
+        super().__init__(start_year, end_year, download_dir, concurrency, fetch_abstracts,
+                         skip_stored_years=False, on_log=print if verbose else (lambda message: None))
+        self.year_latencies = []
+        self.download_latencies = []
+
+    async def scrape_year(self, session, year):
+        start = time.perf_counter()
+        try:
+            return await super().scrape_year(session, year)
+        finally:
+            self.year_latencies.append(time.perf_counter() - start)
+
+    async def download_pdf(self, session, pdf_url, destination_path):
+        start = time.perf_counter()
+        try:
+            return await super().download_pdf(session, pdf_url, destination_path)
+        finally:
+            self.download_latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def stage_report(papers, elapsed, latencies):
+    return {
+        "papers": papers,
+        "seconds": round(elapsed, 3),
+        "papers_per_second": round(papers / elapsed, 2) if elapsed else None,
+        "latency_p50_ms": round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+    }
+
+
+def peak_rss_kb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def install_fake_gemini(backend, keys, rpm_limit):
+    auto_annotator.USE_CATEGORY_CACHE = False
+    # The fake labels are a hash of the title, nothing a local model could learn
+    auto_annotator.USE_LOCAL_MODEL = False
+    auto_annotator.gemini_key_pool = auto_annotator.GeminiKeyPool(
+        [f"fake-key-{index}" for index in range(keys)], auto_annotator.MODEL_NAME, rpm_limit,
+        auto_annotator.GEMINI_TPM_LIMIT)
+    for client in auto_annotator.gemini_key_pool.clients:
+        client.generate_content = backend.model(client.api_key).generate_content
+
+    request_latencies = []
+    generate = auto_annotator.generate_with_gemini_async
+
+    async def timed_generate(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await generate(*args, **kwargs)
+        finally:
+            request_latencies.append(time.perf_counter() - start)
+
+    auto_annotator.generate_with_gemini_async = timed_generate
+    return request_latencies
+
+
+def category_counts(categories):
+    categories = list(categories)
+    return dict(sorted((category, categories.count(category)) for category in set(categories)))
+
+
+def run_stages(app, papers, workdir, args, request_latencies):
+    """Download every PDF, then categorize the downloaded papers, as the two separate steps of the GUI."""
+    download_dir = app.download_dir
+    start = time.perf_counter()
+    asyncio.run(app.download_pdfs_async())
+    elapsed = time.perf_counter() - start
+    download = stage_report(len(papers), elapsed, app.download_latencies)
+    download["megabytes_per_second"] = round(app.bytes_downloaded / (1024 * 1024) / elapsed, 2)
+
+    pdf_files = sorted(name for name in os.listdir(download_dir) if name.endswith(".pdf"))
+    categorizer = auto_annotator.Categorizer(os.path.join(workdir, "categories.csv"), args.extraction_workers,
+                                             on_log=print if args.verbose else (lambda message: None))
+    start = time.perf_counter()
+    categorizer.process_papers(papers, download_dir)
+    categorize = stage_report(len(pdf_files), time.perf_counter() - start, request_latencies)
+    categorize["results"] = category_counts(categorizer.metadata.values())
+    return {"download": download, "categorize": categorize}
+
+
+def run_streaming(app, papers, workdir, args, request_latencies):
+    """Download, extraction and categorization as one streaming run."""
+    auto_annotator.CSV_OUTPUT_FILE = os.path.join(workdir, "categories.csv")
+    app.PIPELINE_EXTRACTION_WORKERS = args.extraction_workers
+    start = time.perf_counter()
+    asyncio.run(app.pipeline_async())
+    report = stage_report(len(papers), time.perf_counter() - start, request_latencies)
+    gauges = {gauge["name"]: gauge["value"] for gauge in auto_annotator.metrics.snapshot()["gauges"]}
+    report["first_category_seconds"] = round(gauges.get("pipeline_first_category_seconds", 0), 3)
+    report["results"] = category_counts(auto_annotator.load_category_index(auto_annotator.CSV_OUTPUT_FILE).values())
+    return report
+
+
+def parse_years(text):
+    first, _, last = text.partition("-")
+    return int(first), int(last or first)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", default="2019-2020", help="year or range, e.g. 2018-2020")
+    parser.add_argument("--papers-per-year", type=int, default=200)
+    parser.add_argument("--pdf-kb", type=int, default=64, help="size of each synthetic PDF")
+    parser.add_argument("--latency-ms", type=float, default=20, help="mean server latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="fraction of papers re-listed from the year before")
+    parser.add_argument("--fetch-abstracts", action="store_true", help="also fetch every abstract page")
+    parser.add_argument("--download-concurrency", type=int, default=scraper.PaperScraper.MAX_CONCURRENT_DOWNLOADS)
+    parser.add_argument("--extraction-workers", type=int, default=auto_annotator.EXTRACTION_WORKERS)
+    parser.add_argument("--gemini-keys", type=int, default=4)
+    parser.add_argument("--gemini-latency-ms", type=float, default=200)
+    parser.add_argument("--gemini-rpm", type=int, default=600, help="per-key limit enforced by the fake backend")
+    parser.add_argument("--client-rpm", type=int, default=None, help="per-key limit the key pool paces to (default: --gemini-rpm)")
+    parser.add_argument("--pipeline", action="store_true", help="stream download, extraction and categorization")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="print the application log")
+    args = parser.parse_args()
+
+    start_year, end_year = parse_years(args.years)
+    server = MockNeurIPSServer(args.papers_per_year, args.pdf_kb, args.latency_ms,
+                               args.error_rate, args.rate_429, args.seed, args.duplicate_rate)
+    base_url = server.start()
+    scraper.PROCEEDINGS_URL = base_url
+    scraper.LEGACY_PROCEEDINGS_URL = base_url
+    backend = FakeGeminiBackend(args.gemini_latency_ms, args.gemini_rpm, args.seed)
+    request_latencies = install_fake_gemini(backend, args.gemini_keys, args.client_rpm or args.gemini_rpm)
+
+    report = {
+        "config": vars(args),
+        "python": platform.python_version(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="neurips-bench-") as workdir, contextlib.redirect_stdout(sys.stderr):
+        # The metadata store and HTTP cache live in the working directory
+        os.chdir(workdir)
+        try:
+            download_dir = os.path.join(workdir, "pdfs")
+            app = HeadlessScraper(start_year, end_year, download_dir, args.download_concurrency,
+                                  args.fetch_abstracts, args.verbose)
+
+            start = time.perf_counter()
+            papers = asyncio.run(app.scrape_metadata_async())
+            report["scrape"] = stage_report(len(papers), time.perf_counter() - start, app.year_latencies)
+
+            app.metadata_list = papers
+            if args.pipeline:
+                report["pipeline"] = run_streaming(app, papers, workdir, args, request_latencies)
+            else:
+                report.update(run_stages(app, papers, workdir, args, request_latencies))
+        finally:
+            os.chdir(cwd)
+            auto_annotator.get_metadata_store().close()
+            server.stop()
+
+    report["server_responses"] = {str(status): count for status, count in sorted(server.responses.items())}
+    report["gemini_calls"] = sum(backend.calls.values())
+    report["gemini_429s"] = sum(backend.rate_limited.values())
+    report["peak_rss_kb"] = peak_rss_kb(resource.RUSAGE_SELF) if resource else None
+    report["peak_rss_children_kb"] = peak_rss_kb(resource.RUSAGE_CHILDREN) if resource else None
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Times how long the scraper and annotator take to start, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+
+Each target is started --runs times; the report gives the median and best wall time, the
+same minus an empty interpreter's start-up, and which heavy dependencies (Gemini SDK, PyPDF2,
+tkinter) the import pulled in. Importing the engines and running cli.py --help should load
+none of them; they are imported on first use.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["google.genai", "PyPDF2", "tkinter"]
+REPORT_MODULES = f"import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+
+TARGETS = [
+    ("python (empty)", ["-c", "pass"]),
+    ("import scraper", ["-c", "import scraper; " + REPORT_MODULES]),
+    ("import auto_annotator", ["-c", "import auto_annotator; " + REPORT_MODULES]),
+    ("cli.py --help", ["cli.py", "--help"]),
+    ("import scraper_gui", ["-c", "import scraper_gui; " + REPORT_MODULES]),
+]
+
+
+def run_once(arguments):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *arguments], cwd=REPO_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{result.stderr}")
+    return elapsed, result.stdout.strip().splitlines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'target':<24}{'median ms':>10}{'best ms':>10}{'over empty':>12}  heavy modules loaded")
+    for name, arguments in TARGETS:
+        timings = []
+        for _ in range(args.runs):
+            elapsed, output = run_once(arguments)
+            timings.append(elapsed * 1000)
+        median = statistics.median(timings)
+        if baseline is None:
+            baseline = median
+        loaded = output[-1] if output and arguments[0] == "-c" and name != "python (empty)" else ""
+        print(f"{name:<24}{median:>10.0f}{min(timings):>10.0f}{median - baseline:>12.0f}  {loaded or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""Local stand-ins for the NeurIPS proceedings site and the Gemini API, used by the benchmarks.
+
+MockNeurIPSServer serves synthetic year index pages, abstract pages and PDFs in the same
+layout as proceedings.neurips.cc, with configurable latency, errors and 429s.
+FakeGenerativeModel stands in for a key's GeminiKeyClient.generate_content with canned
+answers, a latency and a per-key requests-per-minute limit; over the limit it raises a 429
+like the google.genai client does.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter, deque
+
+from aiohttp import web
+
+LABELS = ["Deep Learning", "Computer Vision", "Reinforcement Learning",
+          "Natural Language Processing", "Optimization"]
+
+
+def paper_hash(year, index):
+    return hashlib.md5(f"{year}-{index}".encode()).hexdigest()
+
+
+def paper_title(year, index):
+    return f"Synthetic Paper {index} on Learning Things ({year})"
+
+
+def paper_abstract(year, index):
+    words = ["gradient", "model", "training", "representation", "policy", "image", "language", "bound"]
+    rng = random.Random(f"{year}-{index}")
+    return " ".join(rng.choice(words) for _ in range(120)).capitalize() + "."
+
+
+def pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(title, abstract, padding_kb=0):
+    """A one-page PDF whose text PyPDF2 extracts as title, "Abstract", the abstract and an
+       introduction heading. padding_kb adds an incompressible unreferenced stream, so file
+       sizes can match real papers."""
+    words = abstract.split()
+    lines = [title, "", "Abstract"]
+    while words:
+        lines.append(" ".join(words[:12]))
+        words = words[12:]
+    lines += ["", "1 Introduction", "Body text."]
+    text_ops = "".join(f"({pdf_escape(line)}) '\n" for line in lines)
+    content = f"BT /F1 10 Tf 14 TL 72 740 Td\n{text_ops}ET".encode("latin-1")
+    padding = random.Random(title).randbytes(padding_kb * 1024)
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Length %d >>\nstream\n" % len(padding) + padding + b"\nendstream",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+class MockNeurIPSServer:
+    """Runs an aiohttp app on 127.0.0.1 in a background thread. Every request waits
+       latency_ms (+/- 50% jitter), then fails with a 500 with probability error_rate or a 429
+       with probability rate_429. Both hosts of the real site map onto it. A duplicate_rate
+       fraction of each year's papers re-lists the same paper from the year before (title in
+       upper case, same authors and PDF content)."""
+    def __init__(self, papers_per_year=100, pdf_kb=64, latency_ms=20, error_rate=0.0, rate_429=0.0, seed=0,
+                 duplicate_rate=0.0):
+        self.papers_per_year = papers_per_year
+        self.pdf_kb = pdf_kb
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.duplicate_rate = duplicate_rate
+        self.random = random.Random(seed)
+        self.responses = Counter()
+        self.pdfs = {}
+        self.url = None
+        self.loop = None
+        self.runner = None
+        self.thread = None
+
+    def papers(self, year):
+        return {paper_hash(year, index): index for index in range(self.papers_per_year)}
+
+    def source(self, year, index):
+        """(year, index) of the paper a listing shows: itself, or the year before for duplicates."""
+        if zlib.crc32(f"{year}-{index}".encode()) % 1000 < self.duplicate_rate * 1000:
+            return year - 1, index
+        return year, index
+
+    def title(self, year, index):
+        source_year, source_index = self.source(year, index)
+        title = paper_title(source_year, source_index)
+        return title.upper() if source_year != year else title
+
+    def abstract(self, year, index):
+        return paper_abstract(*self.source(year, index))
+
+    async def delay_or_fail(self):
+        await asyncio.sleep(self.latency * (0.5 + self.random.random()))
+        roll = self.random.random()
+        if roll < self.error_rate:
+            return web.Response(status=500, text="synthetic error")
+        if roll < self.error_rate + self.rate_429:
+            return web.Response(status=429, text="slow down", headers={"Retry-After": "1"})
+        return None
+
+    def respond(self, response):
+        self.responses[response.status] += 1
+        return response
+
+    async def index_page(self, request):
+        failure = await self.delay_or_fail()
+        if failure:
+            return self.respond(failure)
+        year = int(request.match_info["year"])
+        items = "\n".join(
+            f'<li><a title="paper title" href="/paper/{year}/hash/{digest}-Abstract.html">{self.title(year, index)}</a>'
+            f' <i>Author {index}, Second Author</i></li>'
+            for digest, index in self.papers(year).items())
+        return self.respond(web.Response(text=f"<html><body><ul>{items}</ul></body></html>", content_type="text/html"))
+
+    async def abstract_page(self, request):
+        failure = await self.delay_or_fail()
+        if failure:
+            return self.respond(failure)
+        year = int(request.match_info["year"])
+        index = self.papers(year).get(request.match_info["hash"])
+        if index is None:
+            return self.respond(web.Response(status=404))
+        html = (f"<html><body><h4>{self.title(year, index)}</h4><h4>Abstract</h4>"
+                f"<p>{self.abstract(year, index)}</p><h4>Name Change Policy</h4></body></html>")
+        return self.respond(web.Response(text=html, content_type="text/html"))
+
+    async def pdf(self, request):
+        failure = await self.delay_or_fail()
+        if failure:
+            return self.respond(failure)
+        year = int(request.match_info["year"])
+        digest = request.match_info["hash"]
+        index = self.papers(year).get(digest)
+        if index is None:
+            return self.respond(web.Response(status=404))
+        if digest not in self.pdfs:
+            self.pdfs[digest] = make_pdf(self.title(year, index), self.abstract(year, index), self.pdf_kb)
+        body = self.pdfs[digest]
+        return self.respond(web.Response(body=body, content_type="application/pdf",
+                                         headers={"ETag": f'"{zlib.crc32(body):08x}"'}))
+
+    def make_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get(r"/paper/{year:\d+}", self.index_page),
+            web.get(r"/paper/{year:\d+}/hash/{hash:[0-9a-f]+}-Abstract.html", self.abstract_page),
+            web.get(r"/paper/{year:\d+}/file/{hash:[0-9a-f]+}-Paper.pdf", self.pdf),
+            web.get(r"/paper_files/paper/{year:\d+}/file/{hash:[0-9a-f]+}-Paper.pdf", self.pdf),
+        ])
+        return app
+
+    def start(self):
+        """Starts serving and returns the base URL."""
+        started = threading.Event()
+
+        async def serve():
+            self.runner = web.AppRunner(self.make_app())
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, "127.0.0.1", 0)
+            await site.start()
+            host, port = self.runner.addresses[0][:2]
+            self.url = f"http://{host}:{port}"
+            started.set()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(serve(), self.loop)
+        started.wait()
+        return self.url
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+class FakeQuotaError(Exception):
+    """What the fake raises over its rate limit: carries the 429 in `code`, as
+       google.genai.errors.ClientError does, which is all retry_policy looks at."""
+    code = 429
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiBackend:
+    """Shared state of the fake models: per-key request times for the RPM limit, and call counts."""
+    def __init__(self, latency_ms=200, rpm_limit=None, seed=0):
+        self.latency = latency_ms / 1000.0
+        self.rpm_limit = rpm_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent_requests = {}
+        self.calls = Counter()
+        self.rate_limited = Counter()
+
+    def model(self, key):
+        return FakeGenerativeModel(self, key)
+
+    def admit(self, key):
+        now = time.monotonic()
+        with self.lock:
+            self.calls[key] += 1
+            recent = self.recent_requests.setdefault(key, deque())
+            while recent and now - recent[0] > 60:
+                recent.popleft()
+            if self.rpm_limit is not None and len(recent) >= self.rpm_limit:
+                self.rate_limited[key] += 1
+                return False
+            recent.append(now)
+            return True
+
+    def label(self, title):
+        return LABELS[zlib.crc32(title.encode()) % len(LABELS)]
+
+    def answer(self, prompt):
+        """A label for single-paper prompts, a JSON array for batch prompts."""
+        paper_ids = re.findall(r"^Paper ID: (\S+)$", prompt, re.MULTILINE)
+        if paper_ids:
+            titles = re.findall(r"^Title: (.*)$", prompt, re.MULTILINE)
+            return json.dumps([{"id": paper_id, "category": self.label(title)}
+                               for paper_id, title in zip(paper_ids, titles)])
+        title = re.search(r"Research Paper Title:\n(.*)", prompt)
+        return self.label(title.group(1)) if title else "Other"
+
+
+class FakeGenerativeModel:
+    """Drop-in for GeminiKeyClient.generate_content; blocking, like the real client."""
+    def __init__(self, backend, key):
+        self.backend = backend
+        self.key = key
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(self.backend.latency * (0.5 + self.backend.random.random()))
+        if not self.backend.admit(self.key):
+            raise FakeQuotaError("429 RESOURCE_EXHAUSTED. Resource has been exhausted (e.g. check quota).")
+        return FakeResponse(self.backend.answer(prompt))
@@ -0,0 +1,144 @@
+"""Scrape, download and categorize NeurIPS papers from the command line, without the GUIs.
+
+Usage:
+    python cli.py scrape [--years 2018-2024] [--abstracts] [--offline] [--rescrape]
+    python cli.py download [--dir Scrapped_PDFs] [--years 2020-2021] [--concurrency 16]
+    python cli.py pipeline [--dir Scrapped_PDFs] [--years 2020-2021] [--output categories.csv]
+    python cli.py categorize --downloads Scrapped_PDFs [--years 2020-2021] [--output categories.csv]
+    python cli.py categorize --folder Scrapped_PDFs [--output categories.csv] [--workers 8] [--no-resume]
+    python cli.py categorize --metadata [--import python_metadata.csv] [--output categories.csv]
+    python cli.py status [--dir Scrapped_PDFs]
+
+download, pipeline and categorize --downloads work on the papers in the metadata store
+(scraping the default years first if it is empty), optionally only those of --years;
+categorize --downloads sends their scraped titles and abstracts, reading the PDF in the
+folder only for papers without one. Gemini keys are read from
+GOOGLE_API_KEY, GOOGLE_API_KEY2 and GOOGLE_API_KEY3 when categorization starts. The same
+runs are available from Python through scraper.PaperScraper and auto_annotator.Categorizer.
+"""
+import argparse
+import sys
+
+# scraper and auto_annotator are imported by the commands that need them, so that --help
+# and argument errors come back at once
+
+
+def parse_years(text):
+    first, _, last = text.partition("-")
+    return int(first), int(last or first)
+
+
+def make_scraper(args, years=None):
+    from scraper import DEFAULT_DOWNLOAD_DIR, DEFAULT_END_YEAR, DEFAULT_START_YEAR, PaperScraper
+    start_year, end_year = years or (DEFAULT_START_YEAR, DEFAULT_END_YEAR)
+    return PaperScraper(start_year, end_year, download_dir=getattr(args, 'dir', None) or DEFAULT_DOWNLOAD_DIR,
+                        download_concurrency=getattr(args, 'concurrency', None))
+
+
+def selected_papers(scraper, years):
+    """Papers of metadata_list within `years` (all of them if years is None)."""
+    scraper.ensure_metadata()
+    if years is None:
+        return None
+    start_year, end_year = years
+    return [paper for paper in scraper.metadata_list if start_year <= int(paper['year']) <= end_year]
+
+
+def command_scrape(args):
+    scraper = make_scraper(args, args.years)
+    scraper.fetch_abstracts = args.abstracts
+    scraper.offline = args.offline
+    scraper.skip_stored_years = not args.rescrape
+    papers = scraper.scrape()
+    print(f"Scraped {len(papers)} papers.")
+    return 0
+
+
+def command_download(args):
+    scraper = make_scraper(args)
+    scraper.download(selected_papers(scraper, args.years))
+    return 0
+
+
+def command_pipeline(args):
+    import auto_annotator
+    scraper = make_scraper(args)
+    try:
+        scraper.download_and_categorize(selected_papers(scraper, args.years), args.output)
+    except auto_annotator.MissingAPIKeyError as e:
+        print(e, file=sys.stderr)
+        return 2
+    return 0
+
+
+def command_categorize(args):
+    import auto_annotator
+    categorizer = auto_annotator.Categorizer(args.output, args.workers)
+    try:
+        if args.downloads:
+            scraper = make_scraper(args)
+            papers = selected_papers(scraper, args.years)
+            if papers is None:
+                papers = scraper.metadata_list
+            categorizer.process_papers(papers, args.downloads, resume=not args.no_resume)
+        elif args.folder:
+            categorizer.process_folder(args.folder, resume=not args.no_resume)
+        else:
+            categorizer.process_metadata(args.import_csv, resume=not args.no_resume)
+    except auto_annotator.MissingAPIKeyError as e:
+        print(e, file=sys.stderr)
+        return 2
+    return 0
+
+
+def command_status(args):
+    make_scraper(args).log_download_status()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="scrape paper metadata into the metadata store")
+    scrape.add_argument("--years", type=parse_years, help="year or range, e.g. 2018-2024 (default: the GUI's)")
+    scrape.add_argument("--abstracts", action="store_true", help="also fetch every abstract page")
+    scrape.add_argument("--offline", action="store_true", help="only use cached pages")
+    scrape.add_argument("--rescrape", action="store_true", help="scrape years already in the store again")
+    scrape.set_defaults(run=command_scrape)
+
+    for name, run, help_text in (("download", command_download, "download the PDFs of the stored papers"),
+                                 ("pipeline", command_pipeline, "download, extract and categorize in one run")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--dir", help="download folder")
+        command.add_argument("--years", type=parse_years, help="only papers of this year or range")
+        command.add_argument("--concurrency", type=int, help="parallel downloads")
+        if name == "pipeline":
+            command.add_argument("--output", help="categories CSV (default: the annotator's CSV_OUTPUT_FILE)")
+        command.set_defaults(run=run)
+
+    categorize = commands.add_parser("categorize", help="categorize PDFs of a folder or the stored abstracts")
+    source = categorize.add_mutually_exclusive_group(required=True)
+    source.add_argument("--downloads", help="download folder of the stored papers")
+    source.add_argument("--folder", help="folder of PDFs")
+    source.add_argument("--metadata", action="store_true", help="papers with abstracts in the metadata store")
+    categorize.add_argument("--years", type=parse_years, help="only papers of this year or range (with --downloads)")
+    categorize.add_argument("--import", dest="import_csv", help="metadata CSV to import first (with --metadata)")
+    categorize.add_argument("--output", help="categories CSV (default: the annotator's CSV_OUTPUT_FILE)")
+    categorize.add_argument("--workers", type=int, help="abstract extraction processes")
+    categorize.add_argument("--no-resume", action="store_true", help="also categorize papers already in the output")
+    categorize.set_defaults(run=command_categorize)
+
+    status = commands.add_parser("status", help="show the download queue of a folder")
+    status.add_argument("--dir", help="download folder")
+    status.set_defaults(run=command_status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import hashlib
+import re
+import struct
+from array import array
+
+from llm_cache import normalize_title
+from metadata_store import pdf_filename
+
+# Signature length and LSH banding: 16 bands of 4 rows make papers with a Jaccard similarity
+# around 0.5 or more likely to share a bucket; candidates are then checked against the threshold
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+DUPLICATE_THRESHOLD = 0.8
+# Words per shingle of abstract text
+ABSTRACT_SHINGLE_WORDS = 3
+# Shorter abstracts (placeholders, extraction debris) are too generic to mark duplicates
+MIN_DUPLICATE_ABSTRACT_WORDS = 20
+
+
+def author_names(authors):
+    """Last names of an author list, lowercased, in order."""
+    names = []
+    for author in re.split(r",|;|\band\b", authors or ""):
+        words = re.findall(r"\w+", author.lower())
+        if words:
+            names.append(words[-1])
+    return names
+
+
+def paper_fingerprint(title, authors):
+    """Exact key of a paper: normalized title and the set of author last names."""
+    payload = normalize_title(title) + "|" + ",".join(sorted(set(author_names(authors))))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def text_fingerprint(text):
+    return hashlib.sha1(normalize_title(text).encode("utf-8")).hexdigest()
+
+
+def paper_shingles(title, authors):
+    """Title words and word pairs plus author last names, for near matches on metadata."""
+    words = normalize_title(title).split()
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])} | \
+        {f"author:{name}" for name in author_names(authors)}
+
+
+def is_comparable_abstract(text):
+    return len(normalize_title(text).split()) >= MIN_DUPLICATE_ABSTRACT_WORDS
+
+
+def text_shingles(text, size=ABSTRACT_SHINGLE_WORDS):
+    words = normalize_title(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[index:index + size]) for index in range(len(words) - size + 1)}
+
+
+def minhash(shingles, num_permutations=NUM_PERMUTATIONS):
+    """MinHash signature: for each of num_permutations hash functions, the smallest 32-bit hash
+       of any shingle. The hash functions are slices of one SHAKE-128 digest per shingle."""
+    if not shingles:
+        return array('I', [0xFFFFFFFF] * num_permutations)
+    unpack = struct.Struct(f"<{num_permutations}I").unpack
+    size = 4 * num_permutations
+    rows = [unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(size)) for shingle in shingles]
+    return array('I', map(min, zip(*rows)))
+
+
+def estimated_similarity(first, second):
+    """Share of matching signature positions, an estimate of the Jaccard similarity."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class DuplicateIndex:
+    """In-memory index for collapsing duplicates: exact fingerprints in a dict, near matches
+       through MinHash signatures and LSH buckets, so each lookup only compares against papers
+       sharing a band of the signature instead of every paper seen. The first paper of a group
+       is its canonical copy."""
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, num_permutations=NUM_PERMUTATIONS, bands=LSH_BANDS):
+        self.threshold = threshold
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.fingerprints = {}
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+        self.canonical = {}
+
+    def band_keys(self, signature):
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def add(self, item_id, shingles, fingerprint=None):
+        """Indexes an item. Returns (canonical id, similarity): the item's own id and 1.0 if it
+           is new, else the canonical copy it duplicates. Items without shingles are never
+           duplicates and are not indexed, as all their signatures would be equal."""
+        if not shingles:
+            return item_id, 1.0
+        if fingerprint is not None and fingerprint in self.fingerprints:
+            canonical = self.fingerprints[fingerprint]
+            self.canonical[item_id] = canonical
+            return canonical, 1.0
+        signature = minhash(shingles, self.num_permutations)
+        keys = self.band_keys(signature)
+        best, best_similarity = None, 0.0
+        seen = set()
+        for band, key in enumerate(keys):
+            for candidate in self.buckets[band].get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = estimated_similarity(signature, self.signatures[candidate])
+                if similarity > best_similarity:
+                    best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= self.threshold:
+            canonical = self.canonical[best]
+            self.canonical[item_id] = canonical
+            if fingerprint is not None:
+                self.fingerprints[fingerprint] = canonical
+            return canonical, best_similarity
+        # Only canonical copies are indexed; duplicates are found through them
+        self.canonical[item_id] = item_id
+        self.signatures[item_id] = signature
+        if fingerprint is not None:
+            self.fingerprints[fingerprint] = item_id
+        for band, key in enumerate(keys):
+            self.buckets[band].setdefault(key, []).append(item_id)
+        return item_id, 1.0
+
+    def __len__(self):
+        return len(self.canonical)
+
+
+def find_duplicate_papers(papers, threshold=DUPLICATE_THRESHOLD):
+    """{pdf name: (canonical pdf name, similarity)} for every paper that duplicates an earlier
+       one, by title and authors. Papers are taken in the given order, so the earliest listing
+       of a paper stays canonical."""
+    index = DuplicateIndex(threshold)
+    duplicates = {}
+    for paper in papers:
+        name = pdf_filename(paper)
+        if name in index.canonical:
+            continue
+        canonical, similarity = index.add(name, paper_shingles(paper['title'], paper.get('authors')),
+                                          paper_fingerprint(paper['title'], paper.get('authors')))
+        if canonical != name:
+            duplicates[name] = (canonical, similarity)
+    return duplicates
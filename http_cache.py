@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+import aiohttp
+
+from metrics import registry as metrics
+
+
+class HTTPCache:
+    """On-disk cache for GET requests returning text, with HTTP revalidation.
+
+       Every response is stored as <sha256(url)>.body with a .json sidecar holding its ETag,
+       Last-Modified and fetch time. A cached entry younger than its TTL (or with a TTL of None,
+       for pages that never change) is served without a request; an older one is revalidated
+       with If-None-Match/If-Modified-Since and a 304 is served from disk. In offline mode only
+       the cache is used and misses return status 504."""
+    def __init__(self, cache_dir: str, offline: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_fetched = 0
+
+    def paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{digest}.body", self.cache_dir / f"{digest}.json"
+
+    def load_meta(self, meta_path: Path, body_path: Path) -> Optional[Dict]:
+        if not body_path.exists():
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    async def read_body(self, body_path: Path) -> str:
+        async with aiofiles.open(body_path, 'r', encoding='utf-8') as f:
+            return await f.read()
+
+    async def store(self, url: str, response: aiohttp.ClientResponse, text: str):
+        body_path, meta_path = self.paths(url)
+        tmp_path = body_path.with_name(body_path.name + '.tmp')
+        async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+            await f.write(text)
+        os.replace(tmp_path, body_path)
+        self.write_meta(meta_path, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        })
+
+    def write_meta(self, meta_path: Path, meta: Dict):
+        tmp_path = meta_path.with_name(meta_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    async def get_text(self, session: aiohttp.ClientSession, url: str, headers: Dict,
+                       ttl: Optional[float] = 0) -> Tuple[int, str]:
+        """Returns (status, text). ttl is in seconds; None means the cached copy never expires."""
+        body_path, meta_path = self.paths(url)
+        meta = self.load_meta(meta_path, body_path)
+
+        if meta is not None:
+            fresh = ttl is None or time.time() - meta['fetched_at'] < ttl
+            if fresh or self.offline:
+                self.hits += 1
+                metrics.inc('http_cache_requests_total', result='hit')
+                return 200, await self.read_body(body_path)
+        elif self.offline:
+            self.misses += 1
+            metrics.inc('http_cache_requests_total', result='offline_miss')
+            return 504, ""
+
+        headers = dict(headers)
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and meta is not None:
+                self.revalidated += 1
+                metrics.inc('http_cache_requests_total', result='revalidated')
+                meta['fetched_at'] = time.time()
+                self.write_meta(meta_path, meta)
+                return 200, await self.read_body(body_path)
+            if response.status != 200:
+                return response.status, ""
+            text = await response.text()
+            self.misses += 1
+            self.bytes_fetched += len(text.encode('utf-8'))
+            metrics.inc('http_cache_requests_total', result='miss')
+            metrics.inc('bytes_transferred_total', len(text.encode('utf-8')), kind='page')
+            await self.store(url, response, text)
+            return 200, text
+
+    def stats(self) -> str:
+        return (f"{self.hits} served from cache, {self.revalidated} revalidated (304), "
+                f"{self.misses} not cached, {self.bytes_fetched / 1024:.0f} KB downloaded")
@@ -0,0 +1,256 @@
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9\-]+")
+STOP_WORDS = frozenset("""
+    a about above after again all also an and any are as at be because been being below between both
+    but by can could did do does doing each few for from further had has have having here how i if in
+    into is it its itself just more most no nor not of off on once only or other our out over own same
+    she should so some such than that the their them then there these they this those through to too
+    under until up very was we were what when where which while who whom why will with would you
+""".split())
+# Words of the abstract used as features; the opening sentences carry the topic
+ABSTRACT_MAX_WORDS = 300
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOP_WORDS]
+
+
+def paper_terms(title, abstract):
+    """Term counts of a paper. Title words and title bigrams are kept apart from abstract
+       words, since a word in the title says more about the topic."""
+    title_tokens = tokenize(title)
+    terms = {}
+    for term in (["t:" + token for token in title_tokens]
+                 + ["t:" + first + "_" + second for first, second in zip(title_tokens, title_tokens[1:])]
+                 + tokenize(abstract)[:ABSTRACT_MAX_WORDS]):
+        terms[term] = terms.get(term, 0) + 1
+    return terms
+
+
+def is_held_out(key, fraction):
+    return int(key[:8], 16) % 1000 < fraction * 1000
+
+
+class LabelModel:
+    """Local stand-in for Gemini on easy papers: TF-IDF features and a multinomial logistic
+       regression trained online, one SGD step per Gemini answer. Every answer is kept in a
+       SQLite file; a deterministic fraction is held out of training and used to calibrate a
+       confidence threshold per label, the lowest at which the model agreed with Gemini on at
+       least `target_agreement` of the held-out papers. Papers below their label's threshold
+       still go to Gemini. The model is rebuilt from the stored answers when loaded."""
+    def __init__(self, db_path, labels, target_agreement=0.95, min_examples=500, holdout_fraction=0.2,
+                 min_calibration_examples=30, calibrate_every=200, learning_rate=0.5):
+        self.db_path = db_path
+        self.labels = list(labels)
+        self.label_index = {label: index for index, label in enumerate(self.labels)}
+        self.target_agreement = target_agreement
+        self.min_examples = min_examples
+        self.holdout_fraction = holdout_fraction
+        self.min_calibration_examples = min_calibration_examples
+        self.calibrate_every = calibrate_every
+        self.learning_rate = learning_rate
+        self.lock = threading.Lock()
+        self.documents = 0
+        self.document_frequency = {}
+        self.weights = {}
+        self.bias = [0.0] * len(self.labels)
+        self.trained = 0
+        self.held_out = []
+        self.thresholds = {}
+        self.estimate = None
+        self.since_calibration = 0
+        self.answered = 0
+        self.deferred = 0
+        self.audited = 0
+        self.audit_agreed = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS examples (
+                key TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                abstract TEXT NOT NULL,
+                category TEXT NOT NULL,
+                held_out INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )""")
+        self.conn.commit()
+        self.load()
+
+    def example_key(self, title, abstract):
+        return hashlib.sha256(f"{title.strip().lower()}\n{(abstract or '').strip()}".encode("utf-8")).hexdigest()
+
+    def load(self):
+        rows = self.conn.execute("SELECT title, abstract, category, held_out FROM examples ORDER BY rowid").fetchall()
+        with self.lock:
+            for title, abstract, category, held_out in rows:
+                if category in self.label_index:
+                    self.learn_locked(title, abstract, category, held_out)
+            self.calibrate_locked()
+
+    def features(self, terms):
+        """Sublinear TF-IDF weights, L2-normalized."""
+        vector = {}
+        for term, count in terms.items():
+            idf = math.log((1 + self.documents) / (1 + self.document_frequency.get(term, 0))) + 1
+            vector[term] = (1 + math.log(count)) * idf
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        return {term: value / norm for term, value in vector.items()}
+
+    def probabilities(self, vector):
+        scores = list(self.bias)
+        for term, value in vector.items():
+            term_weights = self.weights.get(term)
+            if term_weights is not None:
+                for index, weight in enumerate(term_weights):
+                    scores[index] += weight * value
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def predict_locked(self, title, abstract):
+        probabilities = self.probabilities(self.features(paper_terms(title, abstract)))
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+    def predict(self, title, abstract):
+        """(label, confidence) for a paper, whether or not the model is trusted yet."""
+        with self.lock:
+            return self.predict_locked(title, abstract)
+
+    def classify(self, title, abstract):
+        """The model's label when it clears its calibrated threshold, else None (ask Gemini).
+           Counted as answered locally unless record_audit follows."""
+        with self.lock:
+            if self.trained < self.min_examples or not self.thresholds:
+                self.deferred += 1
+                return None
+            label, confidence = self.predict_locked(title, abstract)
+            if confidence < self.thresholds.get(label, math.inf):
+                self.deferred += 1
+                return None
+            self.answered += 1
+            return label
+
+    def learn_locked(self, title, abstract, category, held_out):
+        terms = paper_terms(title, abstract)
+        self.documents += 1
+        for term in terms:
+            self.document_frequency[term] = self.document_frequency.get(term, 0) + 1
+        if held_out:
+            self.held_out.append((title, abstract, category))
+            return
+        vector = self.features(terms)
+        probabilities = self.probabilities(vector)
+        target = self.label_index[category]
+        rate = self.learning_rate
+        gradient = [probability - (1.0 if index == target else 0.0) for index, probability in enumerate(probabilities)]
+        for index, value in enumerate(gradient):
+            self.bias[index] -= rate * value
+        for term, value in vector.items():
+            term_weights = self.weights.get(term)
+            if term_weights is None:
+                term_weights = self.weights[term] = [0.0] * len(self.labels)
+            for index, g in enumerate(gradient):
+                term_weights[index] -= rate * g * value
+        self.trained += 1
+
+    def learn(self, title, abstract, category):
+        """Records a Gemini answer and trains on it, unless it falls in the held-out fraction.
+           Answers outside the label set (errors) are ignored."""
+        if category not in self.label_index or not (title or abstract):
+            return
+        key = self.example_key(title or "", abstract)
+        held_out = is_held_out(key, self.holdout_fraction)
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO examples (key, title, abstract, category, held_out, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, title or "", abstract or "", category, int(held_out), time.time()))
+            self.conn.commit()
+            if not cursor.rowcount:
+                return
+            self.learn_locked(title or "", abstract or "", category, held_out)
+            self.since_calibration += 1
+            if self.since_calibration >= self.calibrate_every:
+                self.calibrate_locked()
+
+    def record_audit(self, local_label, gemini_label):
+        """Counts a paper the model was confident about that was sent to Gemini anyway."""
+        with self.lock:
+            self.audited += 1
+            if local_label == gemini_label:
+                self.audit_agreed += 1
+
+    def calibrate_locked(self):
+        """Per-label thresholds from the held-out answers: walking down the confidences of the
+           papers predicted as a label, the lowest one at which agreement so far is still at
+           least the target. Labels with too few held-out predictions use the pooled threshold."""
+        self.since_calibration = 0
+        predictions = []
+        for title, abstract, category in self.held_out:
+            label, confidence = self.predict_locked(title, abstract)
+            predictions.append((confidence, label, label == category))
+        pooled = self.threshold_for(predictions)
+        thresholds = {}
+        for label in self.labels:
+            predicted = [prediction for prediction in predictions if prediction[1] == label]
+            if len(predicted) >= self.min_calibration_examples:
+                thresholds[label] = self.threshold_for(predicted)
+            else:
+                thresholds[label] = pooled
+        self.thresholds = {label: threshold for label, threshold in thresholds.items() if threshold < math.inf}
+        accepted = [prediction for prediction in predictions
+                    if prediction[0] >= self.thresholds.get(prediction[1], math.inf)]
+        self.estimate = {
+            'held_out': len(predictions),
+            'coverage': len(accepted) / len(predictions) if predictions else 0.0,
+            'agreement': sum(correct for _, _, correct in accepted) / len(accepted) if accepted else None,
+            'overall_agreement': sum(correct for _, _, correct in predictions) / len(predictions) if predictions else None,
+        }
+
+    def threshold_for(self, predictions):
+        if len(predictions) < self.min_calibration_examples:
+            return math.inf
+        threshold = math.inf
+        agreed = 0
+        for count, (confidence, _, correct) in enumerate(sorted(predictions, reverse=True), start=1):
+            agreed += correct
+            if count >= self.min_calibration_examples and agreed / count >= self.target_agreement:
+                threshold = confidence
+        return threshold
+
+    def report(self):
+        """Agreement with Gemini and the share of Gemini calls saved, measured and estimated."""
+        with self.lock:
+            lines = [f"Local label model: {self.trained} papers trained, {len(self.held_out)} held out."]
+            if self.trained < self.min_examples or not self.thresholds:
+                lines.append(f"  Not answering yet (needs {self.min_examples} trained papers and a calibrated threshold).")
+            if self.estimate and self.estimate['held_out']:
+                agreement = self.estimate['agreement']
+                lines.append(f"  Held-out estimate: answers {self.estimate['coverage']:.0%} of papers locally"
+                             + (f" at {agreement:.1%} agreement with Gemini" if agreement is not None else "")
+                             + f" (all papers: {self.estimate['overall_agreement']:.1%}).")
+            if self.thresholds:
+                lines.append("  Thresholds: " + ", ".join(f"{label} {threshold:.2f}"
+                                                         for label, threshold in sorted(self.thresholds.items())))
+            decisions = self.answered + self.deferred
+            if decisions:
+                # Audited papers were answered locally but sent to Gemini all the same
+                local = self.answered - self.audited
+                lines.append(f"  This run: {local}/{decisions} papers answered locally "
+                             f"({local / decisions:.0%} of Gemini calls saved).")
+            if self.audited:
+                lines.append(f"  Audit: agreed with Gemini on {self.audit_agreed}/{self.audited} "
+                             f"({self.audit_agreed / self.audited:.1%}) confident papers.")
+            return "\n".join(lines)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
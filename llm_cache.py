@@ -0,0 +1,87 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+
+def normalize_title(title):
+    """Lowercases and collapses punctuation/underscores, so a title rebuilt from a
+       sanitized PDF filename (metadata_store.title_from_pdf_name, which drops the year
+       suffix) and the scraped title produce the same key."""
+    return re.sub(r"[\W_]+", " ", (title or "").lower()).strip()
+
+
+def make_cache_key(paper_title, paper_abstract, labels_prompt, model_name, prompt_version):
+    payload = json.dumps([normalize_title(paper_title), (paper_abstract or "").strip(),
+                          labels_prompt, model_name, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CategoryCache:
+    """On-disk cache of LLM categories keyed by a hash of everything that affects the answer:
+       normalized title, abstract, label set, model and prompt version."""
+    def __init__(self, db_path, max_entries=None, max_age_days=None):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS categories (
+                key TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_categories_last_used ON categories(last_used)")
+        self.conn.commit()
+        self.evict(max_entries, max_age_days)
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT category FROM categories WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE categories SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, category, model_name):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO categories (key, category, model, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, category, model_name, now, now))
+            self.conn.commit()
+
+    def evict(self, max_entries=None, max_age_days=None):
+        """Drops entries older than max_age_days, then the least recently used beyond max_entries."""
+        with self.lock:
+            if max_age_days is not None:
+                self.conn.execute("DELETE FROM categories WHERE created_at < ?",
+                                  (time.time() - max_age_days * 86400,))
+            if max_entries is not None:
+                self.conn.execute("""
+                    DELETE FROM categories WHERE key IN (
+                        SELECT key FROM categories ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )""", (max_entries,))
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), {len(self)} entries"
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
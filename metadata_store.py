@@ -0,0 +1,466 @@
+import csv
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+METADATA_DB_PATH = 'python_metadata.sqlite3'
+# Export of the metadata store, for tools that read the scraped metadata as CSV
+METADATA_CSV = 'python_metadata.csv'
+METADATA_FIELDS = ['title', 'authors', 'year', 'pdf_link', 'paper_hash', 'abstract_url', 'abstract']
+CATEGORY_FIELDS = ['PDF Name', 'Category']
+
+# Download job states. A job is leased while a download runs; a lease that is not renewed
+# (its process died) expires and the job is handed out again.
+JOB_PENDING = 'pending'
+JOB_IN_FLIGHT = 'in_flight'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_STATES = [JOB_PENDING, JOB_IN_FLIGHT, JOB_DONE, JOB_FAILED]
+
+metadata_store = None
+metadata_store_lock = threading.Lock()
+
+
+def pdf_filename(paper):
+    """Name a paper's PDF is saved under in the download folder."""
+    title = ''.join(c if c.isalnum() else '_' for c in paper['title'])
+    return f"{title}_{paper['year']}.pdf"
+
+
+def title_from_pdf_name(pdf_name):
+    """Best guess at a paper's title from its PDF name alone: the name without the extension
+       and the _YEAR suffix pdf_filename adds, underscores left for normalize_title."""
+    return re.sub(r"_(19|20)\d\d$", "", os.path.splitext(pdf_name)[0])
+
+
+def name_filter(names):
+    """SQL condition and parameters restricting a download_jobs query to the given PDF names,
+       or to all of them when names is None."""
+    if names is None:
+        return "", ()
+    return " AND pdf_name IN (SELECT value FROM json_each(?))", (json.dumps(list(names)),)
+
+
+def paper_hash_from_link(pdf_link):
+    """Metadata CSVs written before paper_hash was a column only carry the PDF link."""
+    return pdf_link.rstrip('/').split('/')[-1].replace('-Paper.pdf', '')
+
+
+class MetadataStore:
+    """SQLite store (WAL mode) shared by the scraper and the annotator, so either can read and
+       write while the other runs. Holds the scraped papers keyed by paper hash, the download
+       state of each PDF and the download job queue per download folder, the duplicate papers
+       of the corpus, and categories per output CSV. python_metadata.csv
+       and the categorization CSVs are import/export formats of this store."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS papers (
+                paper_hash TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                authors TEXT NOT NULL DEFAULT '',
+                year INTEGER NOT NULL,
+                pdf_link TEXT NOT NULL,
+                abstract_url TEXT NOT NULL DEFAULT '',
+                abstract TEXT NOT NULL DEFAULT '',
+                pdf_name TEXT NOT NULL,
+                scraped_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_papers_year ON papers(year);
+            CREATE INDEX IF NOT EXISTS idx_papers_title ON papers(title);
+            CREATE INDEX IF NOT EXISTS idx_papers_pdf_name ON papers(pdf_name);
+
+            CREATE TABLE IF NOT EXISTS downloads (
+                directory TEXT NOT NULL,
+                pdf_name TEXT NOT NULL,
+                state TEXT NOT NULL,
+                etag TEXT,
+                size INTEGER,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (directory, pdf_name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_downloads_state ON downloads(state);
+
+            CREATE TABLE IF NOT EXISTS download_jobs (
+                directory TEXT NOT NULL,
+                pdf_name TEXT NOT NULL,
+                pdf_link TEXT NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                year INTEGER NOT NULL,
+                priority INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (directory, pdf_name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_download_jobs_queue ON download_jobs(directory, state, priority);
+
+            CREATE TABLE IF NOT EXISTS duplicates (
+                pdf_name TEXT PRIMARY KEY,
+                canonical TEXT NOT NULL,
+                similarity REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_duplicates_canonical ON duplicates(canonical);
+
+            CREATE TABLE IF NOT EXISTS categories (
+                output TEXT NOT NULL,
+                pdf_name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (output, pdf_name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_categories_category ON categories(category);
+            CREATE INDEX IF NOT EXISTS idx_categories_pdf_name ON categories(pdf_name);
+        """)
+        self.conn.commit()
+
+    # --- papers ---
+
+    def upsert_papers(self, papers, scraped_at=None):
+        """Inserts or updates papers by hash. An empty abstract never overwrites a stored one."""
+        scraped_at = scraped_at or time.time()
+        rows = [(paper.get('paper_hash') or paper_hash_from_link(paper['pdf_link']), paper['title'],
+                 paper.get('authors') or '', int(paper['year']), paper['pdf_link'],
+                 paper.get('abstract_url') or '', paper.get('abstract') or '', pdf_filename(paper), scraped_at)
+                for paper in papers]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO papers (paper_hash, title, authors, year, pdf_link, abstract_url, abstract, pdf_name, scraped_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(paper_hash) DO UPDATE SET
+                    title = excluded.title,
+                    authors = excluded.authors,
+                    year = excluded.year,
+                    pdf_link = excluded.pdf_link,
+                    abstract_url = CASE WHEN excluded.abstract_url != '' THEN excluded.abstract_url ELSE papers.abstract_url END,
+                    abstract = CASE WHEN excluded.abstract != '' THEN excluded.abstract ELSE papers.abstract END,
+                    pdf_name = excluded.pdf_name,
+                    scraped_at = excluded.scraped_at""", rows)
+            self.conn.commit()
+
+    def replace_year(self, year, papers):
+        """A fresh scrape replaces a year's stored papers; abstracts fetched earlier are kept
+           for papers that did not get one this time. Returns the year as stored."""
+        scraped_at = time.time()
+        self.upsert_papers(papers, scraped_at)
+        with self.lock:
+            self.conn.execute("DELETE FROM papers WHERE year = ? AND scraped_at < ?", (int(year), scraped_at))
+            self.conn.commit()
+        return self.papers(year=year)
+
+    def papers(self, year=None, with_abstract=False):
+        query = "SELECT title, authors, year, pdf_link, paper_hash, abstract_url, abstract FROM papers"
+        conditions, params = [], []
+        if year is not None:
+            conditions.append("year = ?")
+            params.append(int(year))
+        if with_abstract:
+            conditions.append("abstract != ''")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY year, rowid"
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [self.paper_dict(row) for row in rows]
+
+    def paper_dict(self, row):
+        paper = dict(row)
+        paper['year'] = str(paper['year'])
+        return paper
+
+    def papers_by_year(self, years):
+        """{year: [papers]} for the stored years among `years`, as strings like the CSV."""
+        papers_by_year = {}
+        for year in years:
+            papers = self.papers(year=year)
+            if papers:
+                papers_by_year[str(year)] = papers
+        return papers_by_year
+
+    def paper_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def titles_by_pdf_name(self):
+        """{pdf name: title} of the stored papers, to name PDFs found in a folder."""
+        with self.lock:
+            rows = self.conn.execute("SELECT pdf_name, title FROM papers").fetchall()
+        return {row['pdf_name']: row['title'] for row in rows}
+
+    def uncategorized_papers(self, output, retry_categories):
+        """Papers with an abstract that have no category in `output` yet, or one of
+           `retry_categories` (errors that should be retried)."""
+        placeholders = ", ".join("?" * len(retry_categories))
+        with self.lock:
+            rows = self.conn.execute(f"""
+                SELECT p.title, p.authors, p.year, p.pdf_link, p.paper_hash, p.abstract_url, p.abstract
+                FROM papers p LEFT JOIN categories c ON c.output = ? AND c.pdf_name = p.pdf_name
+                WHERE p.abstract != '' AND (c.category IS NULL OR c.category IN ({placeholders}))
+                ORDER BY p.year, p.rowid""", [os.path.abspath(output), *retry_categories]).fetchall()
+        return [self.paper_dict(row) for row in rows]
+
+    def import_metadata_csv(self, csv_path):
+        """Loads a python_metadata.csv (current or older column sets). Returns the row count."""
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            papers = [paper for paper in csv.DictReader(f) if paper.get('title') and paper.get('pdf_link')]
+        self.upsert_papers(papers)
+        return len(papers)
+
+    def export_metadata_csv(self, csv_path):
+        """Writes every paper, ordered by year, and swaps the file in atomically."""
+        tmp_path = f"{csv_path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=METADATA_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.papers())
+        os.replace(tmp_path, csv_path)
+
+    # --- duplicates ---
+
+    def replace_duplicates(self, duplicates):
+        """duplicates: {pdf name: (canonical pdf name, similarity)} for the whole corpus."""
+        with self.lock:
+            self.conn.execute("DELETE FROM duplicates")
+            self.conn.executemany("INSERT INTO duplicates (pdf_name, canonical, similarity) VALUES (?, ?, ?)",
+                                  [(name, canonical, similarity) for name, (canonical, similarity) in duplicates.items()])
+            self.conn.commit()
+
+    def duplicates(self):
+        """{pdf name: canonical pdf name} of every known duplicate paper."""
+        with self.lock:
+            rows = self.conn.execute("SELECT pdf_name, canonical FROM duplicates").fetchall()
+        return {row['pdf_name']: row['canonical'] for row in rows}
+
+    def duplicates_by_canonical(self):
+        """{canonical pdf name: [pdf names of its duplicates]}."""
+        by_canonical = {}
+        for name, canonical in self.duplicates().items():
+            by_canonical.setdefault(canonical, []).append(name)
+        return by_canonical
+
+    # --- downloads ---
+
+    def load_downloads(self, directory):
+        """{pdf name: {'etag', 'size', 'state'}} for one download folder."""
+        with self.lock:
+            rows = self.conn.execute("SELECT pdf_name, state, etag, size FROM downloads WHERE directory = ?",
+                                     (os.path.abspath(directory),)).fetchall()
+        return {row['pdf_name']: {'etag': row['etag'], 'size': row['size'], 'state': row['state']} for row in rows}
+
+    def save_downloads(self, directory, entries):
+        now = time.time()
+        directory = os.path.abspath(directory)
+        rows = [(directory, name, entry.get('state', 'pending'), entry.get('etag'), entry.get('size'), now)
+                for name, entry in entries.items()]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO downloads (directory, pdf_name, state, etag, size, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)""", rows)
+            self.conn.commit()
+
+    # --- download jobs ---
+
+    def enqueue_downloads(self, directory, papers, newest_first=True):
+        """Adds a job per paper. Jobs already queued keep their state, except failed ones,
+           which go back to pending with a fresh retry count. Higher priority is leased first:
+           newest years first, or oldest with newest_first=False. Returns the number of jobs."""
+        now = time.time()
+        directory = os.path.abspath(directory)
+        rows = [(directory, pdf_filename(paper), paper['pdf_link'], paper['title'], int(paper['year']),
+                 int(paper['year']) if newest_first else -int(paper['year']), JOB_PENDING, now)
+                for paper in papers]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO download_jobs (directory, pdf_name, pdf_link, title, year, priority, state, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (directory, pdf_name) DO UPDATE SET
+                    pdf_link = excluded.pdf_link, title = excluded.title, year = excluded.year,
+                    priority = excluded.priority,
+                    attempts = CASE WHEN state = 'failed' THEN 0 ELSE attempts END,
+                    state = CASE WHEN state = 'failed' THEN 'pending' ELSE state END""", rows)
+            self.conn.commit()
+        return len(rows)
+
+    def reclaim_stale_leases(self, directory):
+        """Returns jobs whose lease has expired to pending. Returns how many there were."""
+        with self.lock:
+            cursor = self.conn.execute("""
+                UPDATE download_jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE directory = ? AND state = ? AND lease_expires < ?""",
+                (JOB_PENDING, time.time(), os.path.abspath(directory), JOB_IN_FLIGHT, time.time()))
+            self.conn.commit()
+        return cursor.rowcount
+
+    def lease_downloads(self, directory, owner, limit, lease_seconds, names=None):
+        """Atomically takes up to `limit` jobs, highest priority first, for `lease_seconds`.
+           Expired leases count as pending. Safe across processes sharing the database.
+           `names` restricts leasing to those PDFs, leaving the rest of the queue alone."""
+        now = time.time()
+        directory = os.path.abspath(directory)
+        condition, params = name_filter(names)
+        with self.lock:
+            # IMMEDIATE takes the write lock up front, so two processes cannot lease the same job
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(f"""
+                    SELECT pdf_name, pdf_link, title, year, attempts FROM download_jobs
+                    WHERE directory = ? AND (state = ? OR (state = ? AND lease_expires < ?)){condition}
+                    ORDER BY priority DESC, pdf_name LIMIT ?""",
+                    (directory, JOB_PENDING, JOB_IN_FLIGHT, now, *params, limit)).fetchall()
+                self.conn.executemany("""
+                    UPDATE download_jobs SET state = ?, lease_owner = ?, lease_expires = ?, updated_at = ?
+                    WHERE directory = ? AND pdf_name = ?""",
+                    [(JOB_IN_FLIGHT, owner, now + lease_seconds, now, directory, row['pdf_name']) for row in rows])
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return [dict(row) for row in rows]
+
+    def renew_leases(self, owner, lease_seconds):
+        with self.lock:
+            self.conn.execute("UPDATE download_jobs SET lease_expires = ? WHERE lease_owner = ? AND state = ?",
+                              (time.time() + lease_seconds, owner, JOB_IN_FLIGHT))
+            self.conn.commit()
+
+    def release_leases(self, owner):
+        """Hands back the jobs `owner` still holds, e.g. when a run is stopped."""
+        with self.lock:
+            self.conn.execute("""
+                UPDATE download_jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE lease_owner = ? AND state = ?""", (JOB_PENDING, time.time(), owner, JOB_IN_FLIGHT))
+            self.conn.commit()
+
+    def finish_download(self, directory, pdf_name, owner, success, error=None, max_attempts=1):
+        """Marks a leased job done, or counts a failed attempt: the job goes back to pending
+           until it has failed max_attempts times, then stays failed. A failure reported
+           after the lease was lost to another process is ignored."""
+        now = time.time()
+        directory = os.path.abspath(directory)
+        with self.lock:
+            if success:
+                self.conn.execute("""
+                    UPDATE download_jobs SET state = ?, lease_owner = NULL, lease_expires = NULL,
+                        last_error = NULL, updated_at = ?
+                    WHERE directory = ? AND pdf_name = ?""", (JOB_DONE, now, directory, pdf_name))
+            else:
+                self.conn.execute("""
+                    UPDATE download_jobs SET attempts = attempts + 1,
+                        state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END,
+                        lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ?
+                    WHERE directory = ? AND pdf_name = ? AND lease_owner = ?""",
+                    (max_attempts, JOB_FAILED, JOB_PENDING, error, now, directory, pdf_name, owner))
+            self.conn.commit()
+
+    def download_status(self, directory, names=None):
+        """{'pending', 'in_flight', 'done', 'failed': job counts, 'by_year': {year: {state: count}},
+           'next_lease_expiry': earliest expiry of a running job or None} for one folder, or for
+           the given PDFs in it."""
+        directory = os.path.abspath(directory)
+        condition, params = name_filter(names)
+        with self.lock:
+            rows = self.conn.execute(f"""
+                SELECT year, state, COUNT(*) AS jobs FROM download_jobs WHERE directory = ?{condition}
+                GROUP BY year, state""", (directory, *params)).fetchall()
+            next_expiry = self.conn.execute(f"SELECT MIN(lease_expires) FROM download_jobs WHERE directory = ? AND state = ?{condition}",
+                                            (directory, JOB_IN_FLIGHT, *params)).fetchone()[0]
+        status = {state: 0 for state in JOB_STATES}
+        by_year = {}
+        for row in rows:
+            status[row['state']] += row['jobs']
+            by_year.setdefault(row['year'], {state: 0 for state in JOB_STATES})[row['state']] = row['jobs']
+        status['by_year'] = dict(sorted(by_year.items()))
+        status['next_lease_expiry'] = next_expiry
+        return status
+
+    def failed_downloads(self, directory):
+        """Failed jobs with their retry count and last error."""
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT pdf_name, pdf_link, year, attempts, last_error FROM download_jobs
+                WHERE directory = ? AND state = ? ORDER BY year, pdf_name""",
+                (os.path.abspath(directory), JOB_FAILED)).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- categories ---
+
+    def has_categories(self, output):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM categories WHERE output = ? LIMIT 1",
+                                     (os.path.abspath(output),)).fetchone() is not None
+
+    def record_categories(self, output, rows):
+        """rows: (pdf name, category) pairs; the latest category for a PDF wins."""
+        now = time.time()
+        output = os.path.abspath(output)
+        with self.lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO categories (output, pdf_name, category, updated_at)
+                VALUES (?, ?, ?, ?)""", [(output, name, category, now) for name, category in rows])
+            self.conn.commit()
+
+    def categories(self, output):
+        """{pdf name: category} recorded for one output CSV."""
+        with self.lock:
+            rows = self.conn.execute("SELECT pdf_name, category FROM categories WHERE output = ? ORDER BY rowid",
+                                     (os.path.abspath(output),)).fetchall()
+        return {row['pdf_name']: row['category'] for row in rows}
+
+    def latest_categories(self):
+        """{pdf name: category} across all output CSVs, the most recently recorded one per PDF."""
+        with self.lock:
+            rows = self.conn.execute("SELECT pdf_name, category FROM categories ORDER BY updated_at, rowid").fetchall()
+        return {row['pdf_name']: row['category'] for row in rows}
+
+    def categorized_abstracts(self):
+        """(title, abstract, category) for every categorized paper whose abstract is stored,
+           oldest category first."""
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT p.title, p.abstract, c.category FROM categories c JOIN papers p ON p.pdf_name = c.pdf_name
+                WHERE p.abstract != '' ORDER BY c.updated_at""").fetchall()
+        return [tuple(row) for row in rows]
+
+    def import_category_csv(self, csv_path):
+        """Loads a categorization CSV ('PDF Name', 'Category'). Returns the row count, or None
+           if the file is not a categorization CSV."""
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or not set(CATEGORY_FIELDS) <= set(reader.fieldnames):
+                return None
+            rows = [(row['PDF Name'], row['Category']) for row in reader if row['PDF Name']]
+        self.record_categories(csv_path, rows)
+        return len(rows)
+
+    def export_category_csv(self, output):
+        """Rewrites `output` with one row per PDF, swapped in atomically."""
+        categories = self.categories(output)
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CATEGORY_FIELDS)
+            writer.writerows(categories.items())
+        os.replace(tmp_path, output)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def get_metadata_store(db_path=METADATA_DB_PATH):
+    global metadata_store
+    with metadata_store_lock:
+        if metadata_store is None:
+            metadata_store = MetadataStore(db_path)
+    return metadata_store
@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = 'neurips_'
+# Upper bounds in seconds: 1 ms doubling up to about 4.5 minutes
+LATENCY_BUCKETS = tuple(0.001 * 2 ** i for i in range(19))
+SNAPSHOT_INTERVAL_SECONDS = 10
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as exported to Prometheus."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given quantile (the maximum for the last one)."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and latency histograms, keyed by name and labels.
+       Safe to update from any thread; worker processes report back to the parent instead."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def reset(self):
+        """Starts a new run. Gauges keep their value, since they describe work still in flight."""
+        with self.lock:
+            self.started = time.time()
+            self.counters = {}
+            self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, label_key(labels))] = value
+
+    def add_gauge(self, name, delta, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + delta
+
+    def observe(self, name, seconds, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def in_flight(self, name, **labels):
+        self.add_gauge(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.add_gauge(name, -1, **labels)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'timestamp': time.time(),
+                'run_seconds': time.time() - self.started,
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                           for (name, labels), value in sorted(self.gauges.items())],
+                'histograms': [{'name': name, 'labels': dict(labels), 'count': histogram.count,
+                                'sum': histogram.sum, 'max': histogram.max,
+                                'p50': histogram.quantile(0.5), 'p99': histogram.quantile(0.99)}
+                               for (name, labels), histogram in sorted(self.histograms.items())],
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+                    for (series_name, labels), value in sorted(series.items()):
+                        if series_name == name:
+                            lines.append(f"{METRIC_PREFIX}{name}{format_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                for (series_name, labels), histogram in sorted(self.histograms.items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{METRIC_PREFIX}{name}_bucket{format_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{METRIC_PREFIX}{name}_sum{format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{METRIC_PREFIX}{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """End-of-run report: where the time went, then the counters."""
+        snapshot = self.snapshot()
+        lines = [f"Metrics for the last {snapshot['run_seconds']:.1f}s:"]
+        for histogram in sorted(snapshot['histograms'], key=lambda h: -h['sum']):
+            labels = format_labels(label_key(histogram['labels']))
+            mean = histogram['sum'] / histogram['count']
+            lines.append(f"  {histogram['name']}{labels}: {histogram['count']} calls, {histogram['sum']:.1f}s total, "
+                         f"mean {mean * 1000:.0f} ms, p50 <= {histogram['p50'] * 1000:.0f} ms, "
+                         f"p99 <= {histogram['p99'] * 1000:.0f} ms, max {histogram['max'] * 1000:.0f} ms")
+        for counter in snapshot['counters']:
+            lines.append(f"  {counter['name']}{format_labels(label_key(counter['labels']))}: {counter['value']}")
+        return "\n".join(lines)
+
+    def write_snapshot(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+registry = MetricsRegistry()
+
+
+class MetricsExporter:
+    """Writes a JSON snapshot of the registry every `interval` seconds and/or serves it in the
+       Prometheus text format at http://127.0.0.1:<port>/metrics, from daemon threads."""
+    def __init__(self, metrics=registry, snapshot_path=None, port=None, interval=SNAPSHOT_INTERVAL_SECONDS):
+        self.metrics = metrics
+        self.snapshot_path = snapshot_path
+        self.port = port
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.server = None
+
+    def start(self):
+        if self.snapshot_path:
+            threading.Thread(target=self.write_periodically, daemon=True).start()
+        if self.port is not None:
+            metrics = self.metrics
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.rstrip('/') != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = metrics.prometheus_text().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def write_periodically(self):
+        while not self.stopped.wait(self.interval):
+            self.metrics.write_snapshot(self.snapshot_path)
+
+    def stop(self):
+        self.stopped.set()
+        if self.snapshot_path:
+            self.metrics.write_snapshot(self.snapshot_path)
+        if self.server:
+            self.server.shutdown()
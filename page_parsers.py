@@ -0,0 +1,89 @@
+from typing import Callable, Dict, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+def make_paper(title: str, authors: str, href: str, year: int, base_url: str, pdf_base: str) -> Dict:
+    paper_hash = href.split('/')[-1].replace('-Abstract.html', '')
+    return {
+        'title': title,
+        'authors': authors,
+        'year': str(year),
+        'pdf_link': f"{pdf_base}/{paper_hash}-Paper.pdf",
+        'paper_hash': paper_hash,
+        'abstract_url': urljoin(base_url, href)
+    }
+
+
+def parse_index_html_parser(html: str, year: int, base_url: str, pdf_base: str) -> List[Dict]:
+    """Pure-Python BeautifulSoup backend."""
+    papers = []
+    soup = BeautifulSoup(html, 'html.parser')
+    for paper_link in soup.select("a[title='paper title']"):
+        href = paper_link.get('href', '')
+        if 'Abstract' not in href:
+            continue
+        authors_tag = paper_link.find_next('i')
+        authors = authors_tag.text.strip() if authors_tag else ""
+        papers.append(make_paper(paper_link.text.strip(), authors, href, year, base_url, pdf_base))
+    return papers
+
+
+def parse_index_lxml(html: str, year: int, base_url: str, pdf_base: str) -> List[Dict]:
+    """libxml2 backend. One pass in document order pairs each title link with the first <i>
+       after its start tag, the element BeautifulSoup's find_next('i') returns."""
+    papers = []
+    if not html.strip():
+        return papers
+    pending = []
+    for element in lxml.html.fromstring(html).iter('a', 'i'):
+        if element.tag == 'a':
+            if element.get('title') == 'paper title' and 'Abstract' in element.get('href', ''):
+                pending.append(element)
+            continue
+        authors = element.text_content().strip()
+        for paper_link in pending:
+            papers.append(make_paper(paper_link.text_content().strip(), authors, paper_link.get('href'),
+                                     year, base_url, pdf_base))
+        pending = []
+    for paper_link in pending:
+        papers.append(make_paper(paper_link.text_content().strip(), "", paper_link.get('href'),
+                                 year, base_url, pdf_base))
+    return papers
+
+
+# Every backend must return identical records for the same page;
+# benchmarks/bench_index_parsers.py checks that on saved index pages.
+INDEX_PARSERS: Dict[str, Callable[[str, int, str, str], List[Dict]]] = {
+    'html.parser': parse_index_html_parser,
+}
+if lxml is not None:
+    INDEX_PARSERS['lxml'] = parse_index_lxml
+
+DEFAULT_INDEX_PARSER = 'lxml' if 'lxml' in INDEX_PARSERS else 'html.parser'
+
+
+def parse_index_page(html: str, year: int, base_url: str, pdf_base: str, backend: str = None) -> List[Dict]:
+    return INDEX_PARSERS[backend or DEFAULT_INDEX_PARSER](html, year, base_url, pdf_base)
+
+
+def parse_abstract_page(html: str) -> str:
+    """Abstract text from a proceedings `-Abstract.html` page: the paragraphs
+       following the "Abstract" heading."""
+    soup = BeautifulSoup(html, 'html.parser')
+    heading = soup.find(lambda tag: tag.name in ('h3', 'h4') and tag.get_text(strip=True).lower() == 'abstract')
+    if heading is None:
+        return ""
+    for tag in heading.find_all_next(['p', 'h3', 'h4']):
+        if tag.name != 'p':
+            break
+        text = ' '.join(tag.get_text(' ', strip=True).split())
+        if text:
+            return text
+    return ""
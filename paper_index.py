@@ -0,0 +1,102 @@
+import bisect
+import re
+from array import array
+
+from metadata_store import pdf_filename
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def search_tokens(text):
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class PaperIndex:
+    """Inverted index over the title and author words of the loaded papers (token -> ids of
+       the papers containing it, in load order), with year and category facets. Every query
+       word matches as a prefix, so results can follow each keystroke: a word is resolved by
+       bisecting the sorted vocabulary, and the words' paper sets are intersected smallest
+       first, so a query costs about the size of its rarest word's postings."""
+    def __init__(self, papers=(), categories=None):
+        self.papers = []
+        self.postings = {}
+        self.vocabulary = []
+        self.vocabulary_dirty = False
+        self.years = {}
+        self.categories = {}
+        self.category_of = {}
+        self.add(papers)
+        if categories:
+            self.set_categories(categories)
+
+    def __len__(self):
+        return len(self.papers)
+
+    def add(self, papers):
+        for paper in papers:
+            paper_id = len(self.papers)
+            self.papers.append(paper)
+            for token in set(search_tokens(paper['title']) + search_tokens(paper.get('authors'))):
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = array('I')
+                    self.vocabulary_dirty = True
+                posting.append(paper_id)
+            self.years.setdefault(str(paper['year']), set()).add(paper_id)
+            category = self.category_of.get(pdf_filename(paper))
+            if category:
+                self.categories.setdefault(category, set()).add(paper_id)
+
+    def set_categories(self, categories):
+        """categories: {pdf name: category}, e.g. the latest category of each categorized paper."""
+        self.category_of = dict(categories)
+        self.categories = {}
+        for paper_id, paper in enumerate(self.papers):
+            category = self.category_of.get(pdf_filename(paper))
+            if category:
+                self.categories.setdefault(category, set()).add(paper_id)
+
+    def year_values(self):
+        return sorted(self.years, key=int)
+
+    def category_values(self):
+        return sorted(self.categories)
+
+    def matching_tokens(self, prefix):
+        if self.vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_dirty = False
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "￿", start)
+        return self.vocabulary[start:end]
+
+    def prefix_ids(self, prefix):
+        tokens = self.matching_tokens(prefix)
+        if len(tokens) == 1:
+            return set(self.postings[tokens[0]])
+        ids = set()
+        for token in tokens:
+            ids.update(self.postings[token])
+        return ids
+
+    def search(self, query="", year=None, category=None):
+        """Ids of the papers matching every word of `query` (as prefixes) and the facets, in
+           load order. An empty query with no facets matches everything."""
+        words = search_tokens(query)
+        # Facets first: they are often the smallest sets
+        candidate_sets = []
+        if year:
+            candidate_sets.append(self.years.get(str(year), set()))
+        if category:
+            candidate_sets.append(self.categories.get(category, set()))
+        for word in sorted(set(words), key=len, reverse=True):
+            candidate_sets.append(self.prefix_ids(word))
+        if not candidate_sets:
+            return list(range(len(self.papers)))
+        candidate_sets.sort(key=len)
+        ids = set(candidate_sets[0])
+        for candidates in candidate_sets[1:]:
+            if not ids:
+                break
+            ids.intersection_update(candidates)
+        return sorted(ids)
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import registry as metrics
+
+# Marks the end of a stage's input
+DONE = None
+
+
+class PaperPipeline:
+    """Runs download -> abstract extraction -> categorization as concurrent stages, so the
+       first papers are categorized while later ones are still downloading. Stages are joined
+       by bounded queues: when categorization falls behind, extraction and then downloads
+       wait instead of piling up work, and wall time approaches that of the slowest stage.
+
+       download(paper) returns the local PDF path or None; extract(path) runs in a process
+       pool and returns (abstract, seconds); categorize([(title, abstract)]) returns one
+       category per paper; record(paper, category) is called once for every paper.
+       Papers that already carry an abstract skip extraction. A categorization batch is sent
+       once it is full or `batch_wait` seconds after its first paper arrived."""
+    def __init__(self, download: Callable[[Dict], Awaitable[Optional[str]]],
+                 extract: Callable[[str], Tuple[Optional[str], float]],
+                 categorize: Callable[[List[Tuple[str, str]]], Awaitable[List[str]]],
+                 record: Callable[[Dict, str], None], log: Callable[[str], None],
+                 download_workers: int, extract_workers: int, categorize_workers: int,
+                 queue_size: int, batch_size: int, batch_wait: float):
+        self.download = download
+        self.extract = extract
+        self.categorize = categorize
+        self.record = record
+        self.log = log
+        self.download_workers = download_workers
+        self.extract_workers = extract_workers
+        self.categorize_workers = categorize_workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.executor = None
+        self.first_category_at = None
+
+    async def run(self, papers: List[Dict]):
+        self.start_time = time.perf_counter()
+        self.papers = asyncio.Queue()
+        for paper in papers:
+            self.papers.put_nowait(paper)
+        self.downloaded = asyncio.Queue(maxsize=self.queue_size)
+        self.extracted = asyncio.Queue(maxsize=self.queue_size)
+
+        self.executor = ProcessPoolExecutor(max_workers=self.extract_workers)
+        try:
+            await asyncio.gather(
+                self.run_stage(self.download_stage, self.download_workers, self.downloaded, self.extract_workers),
+                self.run_stage(self.extract_stage, self.extract_workers, self.extracted, 1),
+                self.categorize_stage())
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+        if self.first_category_at is not None:
+            self.log(f"Pipeline: first paper categorized after {self.first_category_at:.1f}s, "
+                     f"all {len(papers)} after {time.perf_counter() - self.start_time:.1f}s.")
+
+    async def run_stage(self, worker, count, output, consumers):
+        """Runs `count` workers, then tells each of the next stage's workers that input has ended."""
+        await asyncio.gather(*(worker() for _ in range(count)))
+        for _ in range(consumers):
+            await output.put(DONE)
+
+    def report_depths(self):
+        metrics.set_gauge('pipeline_queue_depth', self.papers.qsize(), stage='download')
+        metrics.set_gauge('pipeline_queue_depth', self.downloaded.qsize(), stage='extract')
+        metrics.set_gauge('pipeline_queue_depth', self.extracted.qsize(), stage='categorize')
+
+    async def download_stage(self):
+        while not self.papers.empty():
+            paper = self.papers.get_nowait()
+            self.report_depths()
+            path = await self.download(paper)
+            if path is None:
+                self.record(paper, "Download Failed")
+                continue
+            # Blocks while extraction is a full queue behind
+            await self.downloaded.put((paper, path))
+
+    async def extract_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.downloaded.get()
+            self.report_depths()
+            if item is DONE:
+                return
+            paper, path = item
+            abstract = paper.get('abstract')
+            if not abstract:
+                abstract = await self.extract_abstract(loop, path)
+            # Without an abstract ("Abstract Not Found") the title is still categorized, as
+            # in the annotator; only a PDF that could not be read counts as failed
+            if not abstract:
+                self.record(paper, "Text Extraction Failed")
+                continue
+            await self.extracted.put((paper, abstract))
+
+    async def extract_abstract(self, loop, path):
+        executor = self.executor
+        try:
+            abstract, seconds = await loop.run_in_executor(executor, self.extract, path)
+        except BrokenProcessPool:
+            # A crashing worker takes the pool down with every PDF in it; replace the pool
+            # and retry this PDF in a process of its own, so only the one that crashed fails
+            if executor is self.executor:
+                self.log("Extraction worker pool crashed; starting a new pool.")
+                self.executor = ProcessPoolExecutor(max_workers=self.extract_workers)
+            return await self.extract_isolated(loop, path)
+        except Exception as e:
+            self.log(f"Extraction failed for {path}: {e}")
+            return None
+        metrics.observe('extract_abstract_seconds', seconds)
+        return abstract
+
+    async def extract_isolated(self, loop, path):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                abstract, seconds = await loop.run_in_executor(executor, self.extract, path)
+            except BrokenProcessPool:
+                self.log(f"Extraction worker crashed on {path}")
+                return None
+            except Exception as e:
+                self.log(f"Extraction failed for {path}: {e}")
+                return None
+        metrics.observe('extract_abstract_seconds', seconds)
+        return abstract
+
+    async def categorize_stage(self):
+        """Collects extracted papers into batches and sends up to categorize_workers at once.
+           A single collector keeps batches full while categorization keeps up."""
+        loop = asyncio.get_running_loop()
+        request_slots = asyncio.Semaphore(self.categorize_workers)
+        tasks = []
+        finished = False
+        while not finished:
+            item = await self.extracted.get()
+            if item is DONE:
+                break
+            batch = [item]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = await asyncio.wait_for(self.extracted.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if item is DONE:
+                    finished = True
+                    break
+                batch.append(item)
+            self.report_depths()
+            # Taking a request slot before reading on keeps the backpressure on extraction
+            await request_slots.acquire()
+            tasks.append(asyncio.create_task(self.categorize_batch(batch, request_slots)))
+        await asyncio.gather(*tasks)
+
+    async def categorize_batch(self, batch, request_slots):
+        try:
+            with metrics.in_flight('categorize_batches_in_flight'):
+                categories = await self.categorize([(paper['title'], abstract) for paper, abstract in batch])
+        finally:
+            request_slots.release()
+        if self.first_category_at is None:
+            self.first_category_at = time.perf_counter() - self.start_time
+            metrics.set_gauge('pipeline_first_category_seconds', self.first_category_at)
+        for (paper, _), category in zip(batch, categories):
+            self.record(paper, category)
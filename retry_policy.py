@@ -0,0 +1,146 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Failure classes: transient failures are retried after a backoff, quota failures take the
+# key or host out of rotation until it recovers, permanent failures are not retried
+TRANSIENT = 'transient'
+QUOTA = 'quota'
+PERMANENT = 'permanent'
+
+TRANSIENT_STATUSES = {408, 425, 500, 502, 503, 504}
+QUOTA_STATUSES = {429}
+
+
+def classify_status(status):
+    if status in QUOTA_STATUSES:
+        return QUOTA
+    if status in TRANSIENT_STATUSES:
+        return TRANSIENT
+    return PERMANENT
+
+
+def classify_exception(error):
+    """Classifies by the HTTP status an API error carries (google.genai and google.api_core
+       errors expose it as `code`, aiohttp errors as `status`), then by exception type for
+       network failures. google.genai errors without a status or with a 5xx one, and httpx
+       transport errors (timeouts, dropped connections) under google.genai, are transient."""
+    # Looked up rather than imported: an error from either module means it is loaded, and
+    # importing the Gemini SDK here would undo its lazy import
+    genai_errors = sys.modules.get('google.genai.errors')
+    if genai_errors is not None and isinstance(error, genai_errors.APIError):
+        code = error.code if isinstance(error.code, int) else None
+        if code is None or 500 <= code < 600:
+            return TRANSIENT
+        return classify_status(code)
+    httpx = sys.modules.get('httpx')
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return TRANSIENT
+    for attribute in ('code', 'status'):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return classify_status(int(status))
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return TRANSIENT
+    # aiohttp.ClientConnectionError and friends are OSErrors
+    if isinstance(error, OSError):
+        return TRANSIENT
+    return PERMANENT
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header value (delta-seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from_error(error):
+    """Server-suggested delay carried by an API error: a RetryInfo detail (gRPC, or the JSON
+       error body google.genai errors carry) or the Retry-After header of the underlying HTTP
+       response."""
+    details = getattr(error, 'details', None) or []
+    if isinstance(details, dict):
+        details = details.get('error', {}).get('details') or []
+    for detail in details:
+        if isinstance(detail, dict):
+            # e.g. {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "17s"}
+            retry_delay = detail.get('retryDelay')
+            if isinstance(retry_delay, str) and retry_delay.endswith('s'):
+                try:
+                    return float(retry_delay[:-1])
+                except ValueError:
+                    pass
+            continue
+        retry_delay = getattr(detail, 'retry_delay', None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is not None:
+        return parse_retry_after(headers.get('Retry-After'))
+    return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, min(max_delay,
+       base_delay * 2**(n-1))) seconds, or at least what the server asked for."""
+    def __init__(self, max_attempts, base_delay, max_delay):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error_class, attempt):
+        return error_class != PERMANENT and attempt < self.max_attempts
+
+    def delay(self, attempt, retry_after=None):
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            return max(min(retry_after, self.max_delay), backoff)
+        return backoff
+
+
+class CircuitBreaker:
+    """Takes a throttled API key or host out of rotation. Each quota failure opens the breaker
+       for the server's Retry-After, or for a cooldown that doubles with every consecutive
+       failure; once it elapses requests flow again, and the first success closes it fully."""
+    def __init__(self, base_cooldown, max_cooldown):
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def trip(self, retry_after=None):
+        with self.lock:
+            self.failures += 1
+            cooldown = retry_after
+            if cooldown is None:
+                cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (self.failures - 1))
+            self.open_until = max(self.open_until, time.monotonic() + cooldown)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.open_until = 0.0
+
+    def remaining(self):
+        """Seconds until requests are allowed again (0 when closed)."""
+        return max(0.0, self.open_until - time.monotonic())
+
+    def is_open(self):
+        return self.remaining() > 0
+
+    async def wait_async(self):
+        while self.is_open():
+            await asyncio.sleep(self.remaining())
@@ -1,361 +1,666 @@
 import sys
 sys.path.append(r"E:\SEMESTER\Python scrapper\Packages")
-import threading
 import ssl
 from pathlib import Path
 import aiofiles
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 import time
-from bs4 import BeautifulSoup
 import random
 import os
-import csv
+import socket
+import uuid
+import json
 import asyncio
 import aiohttp
-from tkinter import ttk, scrolledtext, messagebox, filedialog
-import tkinter as tk
-import subprocess 
-
-class NeurIPSScraper(tk.Tk):
-    
-    PRIMARY_COLOR = '#E74C3C'   
-    SECONDARY_COLOR = '#C0392B'  
-    BACKGROUND_COLOR = '#2C3E50' 
-    ACCENT_COLOR = '#27AE60'     
-    TEXT_COLOR = '#ECF0F1'       
-
-    def __init__(self):
-        super().__init__()
-        self.title("NeurIPS Paper Scraper")
-        self.configure(bg=self.BACKGROUND_COLOR)
-        self.state('zoomed')
+from http_cache import HTTPCache
+from metadata_store import (JOB_DONE, JOB_IN_FLIGHT, JOB_PENDING, JOB_STATES, METADATA_CSV, get_metadata_store,
+                            pdf_filename)
+from metrics import registry as metrics
+from retry_policy import (PERMANENT, QUOTA, TRANSIENT, CircuitBreaker, RetryPolicy, classify_exception, classify_status,
+                          parse_retry_after)
+from page_parsers import DEFAULT_INDEX_PARSER, parse_abstract_page, parse_index_page
+from pipeline import PaperPipeline
+from dedup import find_duplicate_papers
+
+PROCEEDINGS_URL = 'https://proceedings.neurips.cc'
+# Years before 2019 are served from the old site
+LEGACY_PROCEEDINGS_URL = 'https://papers.nips.cc'
+
+HTTP_CACHE_DIR = '.http_cache'
+# Defaults of the scraper's options (the GUI starts with these too)
+DEFAULT_START_YEAR = 2018
+DEFAULT_END_YEAR = 2024
+DEFAULT_DOWNLOAD_DIR = 'Scrapped_PDFs'
+# Proceedings older than this many years are final; their pages are never refetched
+FROZEN_YEAR_AGE = 2
+
+def cache_ttl_for_year(year: int) -> Optional[float]:
+    """Seconds a cached page for `year` is served without revalidation (None: forever).
+       Recent years are revalidated on every scrape, which costs a 304 when unchanged."""
+    if year <= time.localtime().tm_year - FROZEN_YEAR_AGE:
+        return None
+    return 0
+
+class PaperScraper:
+    """Scrapes NeurIPS metadata, downloads PDFs and runs Download + Categorize without a GUI;
+       NeurIPSScraper (scraper_gui.py) and cli.py drive it. Options are plain attributes,
+       read when a run starts. Log lines go to on_log, each batch of scraped papers to
+       on_papers and progress in percent to on_progress."""
+
+    USER_AGENTS = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Mozilla/5.0 (Linux; Android 11; Pixel 4 XL) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.63 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:92.0) Gecko/20100101 Firefox/92.0",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
+        "Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Mobile Safari/537.36",
+        "Mozilla/5.0 (Windows NT 6.1; WOW64; Trident/7.0; AS; rv:11.0) like Gecko",
+        "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:96.0) Gecko/20100101 Firefox/96.0",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.1 Safari/605.1.15",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:95.0) Gecko/20100101 Firefox/95.0",
+        "Mozilla/5.0 (iPad; CPU OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",
+    ]
+
+    # Download concurrency: global in-flight cap and per-host connection cap
+    MAX_CONCURRENT_DOWNLOADS = 16
+    MAX_CONNECTIONS_PER_HOST = 8
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    DOWNLOAD_MANIFEST = '.download_manifest.json'
+    MANIFEST_SAVE_INTERVAL = 100
+    # Download job queue: newer years are downloaded first; a job that fails this many runs of
+    # download_pdf stays failed until the next Download PDFs; leases are renewed every third of
+    # their length, so a crashed run's jobs are free again this long after it died
+    DOWNLOAD_NEWEST_FIRST = True
+    DOWNLOAD_JOB_MAX_ATTEMPTS = 3
+    DOWNLOAD_LEASE_SECONDS = 60
+    DOWNLOAD_QUEUE_POLL_SECONDS = 1.0
+    # Retries per PDF, with exponential backoff and full jitter between them
+    DOWNLOAD_MAX_ATTEMPTS = 5
+    DOWNLOAD_BACKOFF_BASE_SECONDS = 1.0
+    DOWNLOAD_BACKOFF_MAX_SECONDS = 30.0
+    # Pause for all downloads after a 429 without Retry-After; doubles per consecutive 429
+    HOST_COOLDOWN_BASE_SECONDS = 2.0
+    HOST_COOLDOWN_MAX_SECONDS = 60.0
+    ABSTRACT_FETCH_CONCURRENCY = 8
+    INDEX_PARSER = DEFAULT_INDEX_PARSER
+    # Download + Categorize: papers waiting between stages; extraction processes (None: the annotator's
+    # setting); how long a partial categorization batch waits for more papers
+    PIPELINE_QUEUE_SIZE = 64
+    PIPELINE_EXTRACTION_WORKERS = None
+    PIPELINE_BATCH_WAIT_SECONDS = 1.0
+    # Metrics export: JSON snapshot file and/or Prometheus endpoint port (None disables)
+    METRICS_SNAPSHOT_FILE = None
+    METRICS_PORT = None
+
+    def __init__(self, start_year: int = DEFAULT_START_YEAR, end_year: int = DEFAULT_END_YEAR,
+                 download_dir: str = DEFAULT_DOWNLOAD_DIR, download_concurrency: Optional[int] = None,
+                 fetch_abstracts: bool = False, skip_stored_years: bool = True, offline: bool = False,
+                 on_log: Optional[Callable[[str], None]] = None,
+                 on_papers: Optional[Callable[[List[Dict]], None]] = None,
+                 on_progress: Optional[Callable[[float], None]] = None):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.download_dir = download_dir
+        self.download_concurrency = download_concurrency
+        self.fetch_abstracts = fetch_abstracts
+        self.skip_stored_years = skip_stored_years
+        self.offline = offline
+        self.on_log = on_log or print
+        self.on_papers = on_papers or (lambda papers: None)
+        self.on_progress = on_progress or (lambda percent: None)
         self.metadata_list = []
-        self.create_styles()
-        self.initialize_gui()
-
-    def create_styles(self):
-        style = ttk.Style()
-        style.theme_use('clam')
-
-        #styling
-        style.configure('TFrame', background=self.BACKGROUND_COLOR)
-        style.configure('TLabelFrame', background=self.BACKGROUND_COLOR,
-                        foreground=self.TEXT_COLOR, font=('Helvetica', 12, 'bold'))
-        style.configure('TLabel', background=self.BACKGROUND_COLOR,
-                        foreground=self.TEXT_COLOR, font=('Helvetica', 12))
-        style.configure('Header.TLabel', font=('Helvetica', 26, 'bold'),
-                        foreground='white')
-        style.configure('TEntry', fieldbackground='white', foreground='black')
-        style.configure('TButton', 
-                        background=self.PRIMARY_COLOR, 
-                        foreground='white', 
-                        font=('Helvetica', 14, 'bold'),
-                        borderwidth=0, 
-                        focusthickness=3, 
-                        padding=(10, 6))  
-        style.map('TButton',
-                  background=[('active', self.SECONDARY_COLOR)],
-                  foreground=[('active', 'white')])
-
-        style.configure('TCombobox', fieldbackground='white', foreground='black', font=('Helvetica', 12))
-        style.configure("Treeview",
-                        background="white",
-                        foreground="black",
-                        fieldbackground="white",
-                        font=('Helvetica', 12))
-        style.configure("Treeview.Heading",
-                        background=self.PRIMARY_COLOR,
-                        foreground="white",
-                        font=('Helvetica', 12, 'bold'))
-
-    def initialize_gui(self):
-       
-       #Styling and Color Scheme
-        self.columnconfigure(0, weight=1)
-        self.rowconfigure(1, weight=1)
-        header_frame = ttk.Frame(self)
-        header_frame.grid(row=0, column=0, columnspan=2, sticky='ew', padx=20, pady=(20, 10))
-        title_label = ttk.Label(header_frame, text="NeurIPS Paper Scraper", style='Header.TLabel')
-        title_label.pack(anchor='center')
-        
-        sidebar_frame = ttk.Frame(self)
-        sidebar_frame.grid(row=1, column=0, sticky='nsw', padx=(20,10), pady=10)
-        sidebar_frame.columnconfigure(0, weight=1)
-        
-        options_frame = ttk.LabelFrame(sidebar_frame, text="Options", padding=10)
-        options_frame.grid(row=0, column=0, sticky='new', pady=(0, 20))
-        
-        current_year = time.localtime().tm_year
-        years = list(range(1990, current_year + 1))
-        
-        # Start Year
-        year_frame = ttk.Frame(options_frame)
-        year_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(year_frame, text="Start Year:").pack(side=tk.LEFT, padx=5)
-        self.start_year = ttk.Combobox(year_frame, values=years, width=8, state='readonly', font=('Helvetica', 12))
-        self.start_year.set("2018")
-        self.start_year.pack(side=tk.LEFT, padx=5)
-        
-        # End Year
-        year_frame2 = ttk.Frame(options_frame)
-        year_frame2.pack(fill=tk.X, pady=5)
-        ttk.Label(year_frame2, text="End Year:").pack(side=tk.LEFT, padx=5)
-        self.end_year = ttk.Combobox(year_frame2, values=years, width=8, state='readonly', font=('Helvetica', 12))
-        self.end_year.set("2024")
-        self.end_year.pack(side=tk.LEFT, padx=5)
-        
-        # Download Folder with Browse button 
-        dir_frame = ttk.Frame(options_frame)
-        dir_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(dir_frame, text="Download Folder:").grid(row=0, column=0, padx=5, sticky=tk.W)
-        self.download_dir = ttk.Entry(dir_frame, font=('Helvetica', 12))
-        self.download_dir.insert(0, "Scrapped_PDFs")
-        self.download_dir.grid(row=0, column=1, padx=5, sticky=tk.EW)
-        ttk.Button(dir_frame, text="Browse...", command=self.browse_directory).grid(row=0, column=2, padx=5, sticky=tk.E)
-        dir_frame.columnconfigure(1, weight=1)
-        
-        buttons_frame = ttk.Frame(options_frame)
-        buttons_frame.pack(fill=tk.X, pady=10)
-        
-        self.scrape_button = ttk.Button(buttons_frame, text="Scrape Metadata", command=self.scrape_metadata)
-        self.scrape_button.pack(fill=tk.X, pady=5)
-        
-        self.download_button = ttk.Button(buttons_frame, text="Download PDFs", command=self.download_pdfs)
-        self.download_button.pack(fill=tk.X, pady=5)
-        
-        self.categorize_button = ttk.Button(buttons_frame, text="Categorization", command=self.open_categorization)
-        self.categorize_button.pack(fill=tk.X, pady=5)
-        
-        content_frame = ttk.Frame(self)
-        content_frame.grid(row=1, column=1, sticky='nsew', padx=(10,20), pady=10)
-        content_frame.columnconfigure(0, weight=1)
-        content_frame.rowconfigure(0, weight=1)
-        
-        # Creating table
-        columns = ("Title", "Authors", "Year", "PDF Link")
-        self.tree = ttk.Treeview(content_frame, columns=columns, show='headings')
-        for col in columns:
-            self.tree.heading(col, text=col)
-            if col == "Title":
-                self.tree.column(col, width=300)
-            elif col == "Authors":
-                self.tree.column(col, width=200)
-            elif col == "Year":
-                self.tree.column(col, width=70)
-            else:
-                self.tree.column(col, width=200)
-                
-        # Adding scrollbars
-        vsb = ttk.Scrollbar(content_frame, orient="vertical", command=self.tree.yview)
-        hsb = ttk.Scrollbar(content_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        self.tree.grid(row=0, column=0, sticky='nsew')
-        vsb.grid(row=0, column=1, sticky='ns')
-        hsb.grid(row=1, column=0, sticky='ew')
-        
-        footer_frame = ttk.Frame(self)
-        footer_frame.grid(row=2, column=0, columnspan=2, sticky='ew', padx=20, pady=(10,20))
-        self.progress_var = tk.DoubleVar()
-        self.progress_bar = ttk.Progressbar(footer_frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.pack(fill=tk.X, pady=(0,5))
-        
-        # Log area below progress bar
-        self.log_area = scrolledtext.ScrolledText(footer_frame, height=8, bg='white',
-                                                   fg='black', font=('Helvetica', 12))
-        self.log_area.pack(fill=tk.BOTH, expand=True)
-        
-    def browse_directory(self):
-        directory = filedialog.askdirectory(initialdir=os.getcwd(), title="Select PDF Download Directory")
-        if directory:
-            self.download_dir.delete(0, tk.END)
-            self.download_dir.insert(0, directory)
+        self.bytes_downloaded = 0
+        self.downloads_skipped = 0
+        self.download_manifest = {}
+        self.download_errors = {}
+        self.download_retry_policy = RetryPolicy(self.DOWNLOAD_MAX_ATTEMPTS, self.DOWNLOAD_BACKOFF_BASE_SECONDS,
+                                                 self.DOWNLOAD_BACKOFF_MAX_SECONDS)
+        self.download_breaker = CircuitBreaker(self.HOST_COOLDOWN_BASE_SECONDS, self.HOST_COOLDOWN_MAX_SECONDS)
 
     def log(self, message: str):
-        self.log_area.insert(tk.END, f"{message}\n")
-        self.log_area.see(tk.END)
+        self.on_log(message)
+
+    def request_headers(self) -> Dict:
+        return {'User-Agent': random.choice(self.USER_AGENTS)}
 
     async def download_pdf(self, session: aiohttp.ClientSession, pdf_url: str, destination_path: str) -> bool:
-        headers = {'User-Agent': random.choice([
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Linux; Android 11; Pixel 4 XL) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.63 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:92.0) Gecko/20100101 Firefox/92.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
-            "Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Mobile Safari/537.36",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64; Trident/7.0; AS; rv:11.0) like Gecko",
-            "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:96.0) Gecko/20100101 Firefox/96.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.1 Safari/605.1.15",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:95.0) Gecko/20100101 Firefox/95.0",
-            "Mozilla/5.0 (iPad; CPU OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1"
-        ])}
+        """Downloads with retries: transient failures back off with full jitter, a 429 pauses
+           every download to the host for its Retry-After, and a retry resumes from the .part
+           file. Permanent failures (404 and other 4xx) are not retried."""
+        for attempt in range(1, self.download_retry_policy.max_attempts + 1):
+            await self.download_breaker.wait_async()
+            success, error_class, retry_after = await self.download_pdf_attempt(session, pdf_url, destination_path)
+            if success:
+                self.download_breaker.record_success()
+                return True
+            self.download_errors[pdf_url] = error_class
+            if not self.download_retry_policy.should_retry(error_class, attempt):
+                return False
+            metrics.inc('download_retries_total', reason=error_class)
+            if error_class == QUOTA:
+                self.download_breaker.trip(retry_after)
+            else:
+                await asyncio.sleep(self.download_retry_policy.delay(attempt, retry_after))
+        return False
+
+    async def download_pdf_attempt(self, session: aiohttp.ClientSession, pdf_url: str,
+                                   destination_path: str) -> Tuple[bool, Optional[str], Optional[float]]:
+        """One try at a PDF. Returns (success, failure class, server-suggested retry delay)."""
+        headers = self.request_headers()
+        destination = Path(destination_path)
+        part_path = destination.with_name(destination.name + '.part')
+        entry = self.download_manifest.get(destination.name, {})
         try:
+            if destination.exists():
+                if await self.is_download_complete(session, pdf_url, destination, entry, headers):
+                    self.downloads_skipped += 1
+                    metrics.inc('downloads_skipped_total')
+                    return True, None, None
+                destination.unlink()
+
+            resume_from = part_path.stat().st_size if part_path.exists() else 0
+            if resume_from:
+                metrics.inc('download_resumes_total')
+                headers['Range'] = f"bytes={resume_from}-"
+                if entry.get('etag'):
+                    headers['If-Range'] = entry['etag']
+
             async with session.get(pdf_url, headers=headers) as response:
-                if response.status == 200:
-                    async with aiofiles.open(destination_path, 'wb') as f:
-                        await f.write(await response.read())
-                    return True
-                self.log(f"Failed to download {pdf_url}: HTTP {response.status}")
-                return False
+                if response.status == 416 and resume_from and resume_from == entry.get('size'):
+                    os.replace(part_path, destination)
+                    return True, None, None
+                if response.status not in (200, 206):
+                    self.log(f"Failed to download {pdf_url}: HTTP {response.status}")
+                    if response.status == 416:
+                        # The stale .part is gone; the next attempt starts over
+                        part_path.unlink()
+                        return False, TRANSIENT, None
+                    return False, classify_status(response.status), parse_retry_after(response.headers.get('Retry-After'))
+
+                # 200 means the server ignored the range (or the file changed): start over
+                mode = 'ab' if response.status == 206 else 'wb'
+                expected_size = response.content_length
+                if expected_size is not None and mode == 'ab':
+                    expected_size += resume_from
+                entry = {'etag': response.headers.get('ETag'), 'size': expected_size}
+                self.download_manifest[destination.name] = entry
+
+                async with aiofiles.open(part_path, mode) as f:
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+                        self.bytes_downloaded += len(chunk)
+                        metrics.inc('bytes_transferred_total', len(chunk), kind='pdf')
+
+            if expected_size is not None and part_path.stat().st_size != expected_size:
+                self.log(f"Incomplete download {pdf_url}: {part_path.stat().st_size}/{expected_size} bytes, will resume")
+                return False, TRANSIENT, None
+            os.replace(part_path, destination)
+            entry['size'] = destination.stat().st_size
+            return True, None, None
         except Exception as e:
             self.log(f"Error downloading {pdf_url}: {str(e)}")
-            return False
+            return False, classify_exception(e), None
+
+    async def is_download_complete(self, session: aiohttp.ClientSession, pdf_url: str, destination: Path,
+                                   entry: Dict, headers: Dict) -> bool:
+        """Files only reach their final name through an atomic rename, so a size that matches the
+           manifest is trusted without a request. Files from older runs are checked with a HEAD."""
+        size = destination.stat().st_size
+        if entry:
+            return entry.get('size') in (None, size)
+        async with session.head(pdf_url, headers=headers, allow_redirects=True) as response:
+            if response.status != 200:
+                return size > 0
+            expected_size = response.content_length
+            if expected_size is not None and expected_size != size:
+                return False
+            self.download_manifest[destination.name] = {'etag': response.headers.get('ETag'), 'size': size}
+            return size > 0
+
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str, headers: Dict,
+                         ttl: Optional[float]) -> Tuple[int, str]:
+        """GET through the HTTP cache, retried like PDF downloads. Returns the last (status, text);
+           the last network error is raised once the attempts run out."""
+        for attempt in range(1, self.download_retry_policy.max_attempts + 1):
+            await self.download_breaker.wait_async()
+            try:
+                status, text = await self.http_cache.get_text(session, url, headers, ttl)
+            except Exception as e:
+                error_class = classify_exception(e)
+                if not self.download_retry_policy.should_retry(error_class, attempt):
+                    raise
+            else:
+                # Offline misses (504) come from the cache, not the server
+                if status == 200 or self.http_cache.offline:
+                    self.download_breaker.record_success()
+                    return status, text
+                error_class = classify_status(status)
+                if not self.download_retry_policy.should_retry(error_class, attempt):
+                    return status, text
+            metrics.inc('page_retries_total', reason=error_class)
+            if error_class == QUOTA:
+                self.download_breaker.trip()
+            else:
+                await asyncio.sleep(self.download_retry_policy.delay(attempt))
+        return status, text
 
     async def scrape_year(self, session: aiohttp.ClientSession, year: int) -> List[Dict]:
         if year < 2019:
-            base_url = f"https://papers.nips.cc/paper/{year}"
-            pdf_base = f"https://papers.nips.cc/paper_files/paper/{year}/file"
+            base_url = f"{LEGACY_PROCEEDINGS_URL}/paper/{year}"
+            pdf_base = f"{LEGACY_PROCEEDINGS_URL}/paper_files/paper/{year}/file"
         else:
-            base_url = f"https://proceedings.neurips.cc/paper/{year}"
-            pdf_base = f"https://proceedings.neurips.cc/paper/{year}/file"
-
-        headers = {'User-Agent': random.choice([
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Linux; Android 11; Pixel 4 XL) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.63 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:92.0) Gecko/20100101 Firefox/92.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
-            "Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Mobile Safari/537.36",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64; Trident/7.0; AS; rv:11.0) like Gecko",
-            "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:96.0) Gecko/20100101 Firefox/96.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.1 Safari/605.1.15",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:95.0) Gecko/20100101 Firefox/95.0",
-            "Mozilla/5.0 (iPad; CPU OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1"
-        ])}
+            base_url = f"{PROCEEDINGS_URL}/paper/{year}"
+            pdf_base = f"{PROCEEDINGS_URL}/paper/{year}/file"
+
+        headers = self.request_headers()
         papers = []
         try:
-            async with session.get(base_url, headers=headers) as response:
-                if response.status != 200:
-                    self.log(f"Failed to fetch year {year}: HTTP {response.status}")
-                    return papers
-
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                paper_links = soup.select("a[title='paper title']")
-
-                for paper_link in paper_links:
-                    try:
-                        title = paper_link.text.strip()
-                        authors_tag = paper_link.find_next('i')
-                        authors = authors_tag.text.strip() if authors_tag else ""
-                        abstract_url = paper_link.get('href', '')
-                        if 'Abstract' in abstract_url:
-                            paper_hash = abstract_url.split('/')[-1].replace('-Abstract.html', '')
-                            pdf_link = f"{pdf_base}/{paper_hash}-Paper.pdf"
-                            papers.append({
-                                'title': title,
-                                'authors': authors,
-                                'year': str(year),
-                                'pdf_link': pdf_link
-                            })
-                    except Exception as e:
-                        self.log(f"Error processing paper: {str(e)}")
-                self.log(f"Year {year}: {len(papers)} papers saved in metadata.")
+            with metrics.timer('scrape_fetch_seconds'):
+                status, html = await self.fetch_page(session, base_url, headers, cache_ttl_for_year(year))
+            if status != 200:
+                self.log(f"Failed to fetch year {year}: HTTP {status}")
+                return papers
+
+            # Parsing a full year takes long enough to stall other downloads if run on the loop
+            with metrics.timer('scrape_parse_seconds'):
+                papers = await asyncio.get_running_loop().run_in_executor(
+                    None, parse_index_page, html, year, base_url, pdf_base, self.INDEX_PARSER)
+            self.log(f"Year {year}: {len(papers)} papers saved in metadata.")
         except Exception as e:
             self.log(f"Error scraping year {year}: {str(e)}")
         return papers
 
+    async def fetch_abstract(self, session: aiohttp.ClientSession, paper: Dict) -> bool:
+        try:
+            with metrics.timer('abstract_fetch_seconds'):
+                status, html = await self.fetch_page(session, paper['abstract_url'], self.request_headers(),
+                                                     cache_ttl_for_year(int(paper['year'])))
+            if status != 200:
+                self.log(f"Failed to fetch abstract for {paper['title']}: HTTP {status}")
+                return False
+            paper['abstract'] = await asyncio.get_running_loop().run_in_executor(None, parse_abstract_page, html)
+            return bool(paper['abstract'])
+        except Exception as e:
+            self.log(f"Error fetching abstract for {paper['title']}: {str(e)}")
+            return False
+
+    async def fetch_abstracts_async(self, session: aiohttp.ClientSession, papers: List[Dict]):
+        """Fills paper['abstract'] from each paper's abstract page, a few KB of HTML
+           instead of downloading and parsing the whole PDF."""
+        semaphore = asyncio.Semaphore(self.ABSTRACT_FETCH_CONCURRENCY)
+
+        async def fetch(paper: Dict) -> bool:
+            async with semaphore:
+                return await self.fetch_abstract(session, paper)
+
+        self.log(f"Fetching {len(papers)} abstracts ({self.ABSTRACT_FETCH_CONCURRENCY} parallel)...")
+        results = await asyncio.gather(*(fetch(paper) for paper in papers if paper.get('abstract_url')))
+        self.log(f"Fetched {sum(results)}/{len(papers)} abstracts.")
+
+    def open_metadata_store(self):
+        store = get_metadata_store()
+        if store.paper_count() == 0 and Path(METADATA_CSV).exists():
+            imported = store.import_metadata_csv(METADATA_CSV)
+            self.log(f"Imported {imported} papers from {METADATA_CSV} into {store.db_path}.")
+        return store
+
     async def scrape_metadata_async(self):
-        start_year = int(self.start_year.get())
-        end_year = int(self.end_year.get())
+        """Scrapes every year in the range concurrently. Each year is written to the metadata
+           store and shown as soon as it finishes, so the first results appear after the
+           fastest year rather than the slowest."""
+        metrics.reset()
+        start_year = int(self.start_year)
+        end_year = int(self.end_year)
+        fetch_abstracts = self.fetch_abstracts
+        self.http_cache = HTTPCache(HTTP_CACHE_DIR, offline=self.offline)
+        store = self.open_metadata_store()
+        papers_by_year = store.papers_by_year(range(start_year, end_year + 1))
+        all_papers = []
+
+        to_scrape = []
+        for year in range(start_year, end_year + 1):
+            stored = papers_by_year.get(str(year))
+            # A stored year without abstracts is scraped again when abstracts are requested
+            if stored and self.skip_stored_years and not (fetch_abstracts and not all(p.get('abstract') for p in stored)):
+                self.log(f"Year {year}: {len(stored)} papers loaded from {store.db_path}.")
+                all_papers.extend(stored)
+                self.on_papers(stored)
+            else:
+                to_scrape.append(year)
+
         timeout = aiohttp.ClientTimeout(total=60)
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
         connector = aiohttp.TCPConnector(ssl=ssl_context)
         async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-            tasks = [self.scrape_year(session, year) for year in range(start_year, end_year + 1)]
-            results = await asyncio.gather(*tasks)
-            all_papers = []
-            for papers in results:
+            async def scrape(year: int):
+                papers = await self.scrape_year(session, year)
+                if papers and fetch_abstracts:
+                    await self.fetch_abstracts_async(session, papers)
+                return year, papers
+
+            for next_year in asyncio.as_completed([scrape(year) for year in to_scrape]):
+                year, papers = await next_year
+                if not papers:
+                    # Keep whatever was stored if this year's fetch failed
+                    papers = papers_by_year.get(str(year), [])
+                else:
+                    papers = store.replace_year(year, papers)
                 all_papers.extend(papers)
-            csv_path = Path('python_metadata.csv')
-            if not csv_path.exists():
-                with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=['title', 'authors', 'year', 'pdf_link'])
-                    writer.writeheader()
-                    writer.writerows(all_papers)
-            return all_papers
-
-    async def download_pdfs_async(self):
-        download_dir = Path(self.download_dir.get())
-        download_dir.mkdir(exist_ok=True)
+                self.on_papers(papers)
+        if to_scrape:
+            self.log(f"HTTP cache: {self.http_cache.stats()}")
+            store.export_metadata_csv(METADATA_CSV)
+            await self.update_duplicates(store)
+        all_papers.sort(key=lambda paper: int(paper['year']))
+        self.log(metrics.summary())
+        return all_papers
+
+    async def update_duplicates(self, store):
+        """Finds the papers listed more than once across all stored years (same title and
+           authors, up to small differences). Downloads skip them, and categorization gives
+           them the category of the first listing."""
+        papers = store.papers()
+        with metrics.timer('dedup_seconds'):
+            duplicates = await asyncio.get_running_loop().run_in_executor(None, find_duplicate_papers, papers)
+        store.replace_duplicates(duplicates)
+        metrics.set_gauge('duplicate_papers', len(duplicates))
+        self.log(f"Duplicates: {len(duplicates)} of {len(papers)} papers repeat an earlier listing.")
+
+    def without_duplicates(self, papers: List[Dict]) -> List[Dict]:
+        duplicates = get_metadata_store().duplicates()
+        unique = [paper for paper in papers if pdf_filename(paper) not in duplicates]
+        if len(unique) < len(papers):
+            self.log(f"Skipping {len(papers) - len(unique)} duplicate papers.")
+        return unique
+
+    def load_download_manifest(self, download_dir: Path) -> Dict:
+        manifest = get_metadata_store().load_downloads(download_dir)
+        # Folders downloaded before the metadata store existed keep their state in a JSON file
+        legacy_path = download_dir / self.DOWNLOAD_MANIFEST
+        if not manifest and legacy_path.exists():
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                pass
+        return manifest
+
+    def save_download_manifest(self, download_dir: Path):
+        get_metadata_store().save_downloads(download_dir, self.download_manifest)
+
+    def get_download_concurrency(self) -> int:
+        try:
+            return max(1, int(self.download_concurrency or self.MAX_CONCURRENT_DOWNLOADS))
+        except ValueError:
+            return self.MAX_CONCURRENT_DOWNLOADS
+
+    def download_connector(self, concurrency: int) -> aiohttp.TCPConnector:
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
+        return aiohttp.TCPConnector(ssl=ssl_context, limit=concurrency,
+                                    limit_per_host=min(concurrency, self.MAX_CONNECTIONS_PER_HOST))
+
+    def download_owner(self) -> str:
+        """Lease owner id of one run: host, process and a random suffix."""
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def renew_download_leases(self, owner: str):
+        """Keeps `owner`'s leases alive while its downloads run; cancelled when the run ends."""
+        store = get_metadata_store()
+        while True:
+            await asyncio.sleep(self.DOWNLOAD_LEASE_SECONDS / 3)
+            store.renew_leases(owner, self.DOWNLOAD_LEASE_SECONDS)
+
+    async def download_pdfs_async(self, papers: Optional[List[Dict]] = None):
+        """Works through the download job queue of the download folder, after queueing
+           `papers` (default: metadata_list). The queue lives in the metadata store, so a stopped
+           or crashed run resumes where it left off: finished PDFs are not revisited, and jobs a
+           dead run had leased are handed out again once their lease expires. Given `papers`,
+           only their jobs are worked on; the rest of the queue waits for a later run."""
+        metrics.reset()
+        download_dir = Path(self.download_dir)
+        download_dir.mkdir(exist_ok=True)
+        concurrency = self.get_download_concurrency()
+        connector = self.download_connector(concurrency)
+        store = get_metadata_store()
+        names = None
+        if papers is None:
+            papers = self.without_duplicates(self.metadata_list)
+        else:
+            papers = self.without_duplicates(papers)
+            names = [pdf_filename(paper) for paper in papers]
+            self.log(f"Search filter: downloading {len(papers)} of {len(self.metadata_list)} papers.")
+        store.enqueue_downloads(download_dir, papers, self.DOWNLOAD_NEWEST_FIRST)
+        reclaimed = store.reclaim_stale_leases(download_dir)
+        status = store.download_status(download_dir, names)
+        total = status[JOB_PENDING] + status[JOB_IN_FLIGHT]
+        self.log(f"Download queue: {status[JOB_PENDING]} pending ({reclaimed} reclaimed from an interrupted run), "
+                 f"{status[JOB_IN_FLIGHT]} running elsewhere, {status[JOB_DONE]} done.")
+        owner = self.download_owner()
+        self.bytes_downloaded = 0
+        self.downloads_skipped = 0
+        self.download_errors = {}
+        self.download_manifest = self.load_download_manifest(download_dir)
+        metrics.set_gauge('downloads_queued', status[JOB_PENDING])
+        leased = []
+        lease_lock = asyncio.Lock()
+        completed = 0
+        failures = 0
+        start_time = time.time()
+
+        async def next_job() -> Optional[Dict]:
+            async with lease_lock:
+                while not leased:
+                    jobs = store.lease_downloads(download_dir, owner, concurrency, self.DOWNLOAD_LEASE_SECONDS, names)
+                    if jobs:
+                        leased.extend(jobs)
+                        break
+                    # Running jobs may still come back as pending: failed ones are requeued,
+                    # and those of a dead run once their lease expires
+                    next_expiry = store.download_status(download_dir, names)['next_lease_expiry']
+                    if next_expiry is None:
+                        return None
+                    await asyncio.sleep(min(max(0.0, next_expiry - time.time()), self.DOWNLOAD_QUEUE_POLL_SECONDS))
+                return leased.pop(0)
+
+        async def worker():
+            nonlocal completed, failures
+            while True:
+                job = await next_job()
+                if job is None:
+                    return
+                metrics.add_gauge('downloads_queued', -1)
+                path = download_dir / job['pdf_name']
+                with metrics.in_flight('downloads_in_flight'), metrics.timer('download_pdf_seconds'):
+                    success = await self.download_pdf(session, job['pdf_link'], str(path))
+                metrics.inc('downloads_total', result='ok' if success else 'failed')
+                error = self.download_errors.pop(job['pdf_link'], None)
+                # Only transient failures are requeued; a 404 will not come back within this run
+                max_attempts = 1 if error == PERMANENT else self.DOWNLOAD_JOB_MAX_ATTEMPTS
+                store.finish_download(download_dir, job['pdf_name'], owner, success, error, max_attempts)
+                if not success and job['attempts'] + 1 < max_attempts:
+                    metrics.add_gauge('downloads_queued', 1)
+                    self.log(f"Requeued {path.stem} (attempt {job['attempts'] + 1}/{self.DOWNLOAD_JOB_MAX_ATTEMPTS} failed)")
+                    continue
+                completed += 1
+                if not success:
+                    failures += 1
+                self.log(f"[{completed}/{total}] {'Downloaded' if success else 'Failed to download'}: {path.stem}")
+                self.on_progress((completed / max(total, 1)) * 100)
+                if completed % self.MANIFEST_SAVE_INTERVAL == 0:
+                    self.save_download_manifest(download_dir)
+
         async with aiohttp.ClientSession(connector=connector) as session:
-            total = len(self.metadata_list)
-            for i, paper in enumerate(self.metadata_list, 1):
-                title = ''.join(c if c.isalnum() else '_' for c in paper['title'])
-                path = download_dir / f"{title}_{paper['year']}.pdf"
-                self.log(f"Downloading: {title}")
-                success = await self.download_pdf(session, paper['pdf_link'], str(path))
-                self.log(f"{'Downloaded' if success else 'Failed to download'}: {title}")
-                progress = (i / total) * 100
-                self.progress_var.set(progress)
-
-    def scrape_metadata(self):
-        self.scrape_button.config(state=tk.DISABLED)
-        self.tree.delete(*self.tree.get_children())
-        self.progress_var.set(0)
-        def run_scrape():
-            start_time = time.time()
-            papers = asyncio.run(self.scrape_metadata_async())
-            elapsed_time = time.time() - start_time
-            self.after(0, self.finish_scrape, papers, elapsed_time)
-        threading.Thread(target=run_scrape, daemon=True).start()
-
-    def finish_scrape(self, papers, elapsed_time):
-        self.metadata_list = papers
-        for paper in papers:
-            self.tree.insert('', tk.END, values=(paper['title'], paper['authors'], paper['year'], paper['pdf_link']))
-        self.scrape_button.config(state=tk.NORMAL)
-        messagebox.showinfo("Scraping Complete",
-                            f"Scraped {len(papers)} papers\nTotal time: {elapsed_time:.2f} seconds")
-
-    def download_pdfs(self):
-        self.download_button.config(state=tk.DISABLED)
-        self.progress_var.set(0)
-        def run_download():
-            if not self.metadata_list:
-                csv_path = Path('python_metadata.csv')
-                if csv_path.exists():
-                    self.log("Loading metadata from existing CSV...")
-                    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
-                        reader = csv.DictReader(f)
-                        papers = list(reader)
-                    self.metadata_list = papers
-                    for paper in papers:
-                        self.tree.insert('', tk.END, values=(paper['title'], paper['authors'], paper['year'], paper['pdf_link']))
-                else:
-                    self.log("No metadata found. Scraping metadata now...")
-                    start_time = time.time()
-                    papers = asyncio.run(self.scrape_metadata_async())
-                    elapsed_time = time.time() - start_time
-                    self.after(0, self.finish_scrape, papers, elapsed_time)
-            asyncio.run(self.download_pdfs_async())
-            self.after(0, self.finish_download)
-        threading.Thread(target=run_download, daemon=True).start()
-
-    def finish_download(self):
-        self.download_button.config(state=tk.NORMAL)
-        messagebox.showinfo("Download Complete", "PDF Download Complete")
-        
-    def open_categorization(self):
-        try:
-            subprocess.Popen(["python", "auto_annotator.py"])
-            self.log("Launched auto_annotator.py for categorization.")
-        except Exception as e:
-            self.log(f"Failed to launch auto_annotator.py: {e}")
+            self.log(f"Downloading {total} PDFs ({concurrency} parallel)...")
+            renewer = asyncio.create_task(self.renew_download_leases(owner))
+            try:
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+            finally:
+                renewer.cancel()
+                store.release_leases(owner)
+                self.save_download_manifest(download_dir)
+
+        elapsed_time = max(time.time() - start_time, 1e-9)
+        megabytes = self.bytes_downloaded / (1024 * 1024)
+        self.log(f"Download summary: {completed - failures}/{completed} papers "
+                 f"({self.downloads_skipped} already present), {failures} failures, "
+                 f"{megabytes:.1f} MB in {elapsed_time:.1f}s "
+                 f"({megabytes / elapsed_time:.2f} MB/s, {completed / elapsed_time:.2f} papers/s)")
+        self.log_download_status(download_dir)
+        self.log(metrics.summary())
+
+    def log_download_status(self, download_dir: Optional[Path] = None):
+        download_dir = Path(download_dir or self.download_dir)
+        status = get_metadata_store().download_status(download_dir)
+        self.log(f"Download queue for {download_dir}: " + ", ".join(f"{status[state]} {state}" for state in JOB_STATES))
+        for year, counts in status['by_year'].items():
+            self.log(f"  {year}: " + ", ".join(f"{counts[state]} {state}" for state in JOB_STATES if counts[state]))
+
+    async def pipeline_async(self, papers: Optional[List[Dict]] = None, output: Optional[str] = None):
+        """Downloads, extracts and categorizes `papers` (default: metadata_list) in one
+           streaming run (see pipeline.PaperPipeline). Categories go to `output` (default: the
+           annotator's CSV_OUTPUT_FILE) as they arrive; papers already categorized there are
+           skipped. Downloads go through the same job queue as download_pdfs_async: each is
+           leased, PDFs an earlier run finished are not fetched again, and failures are
+           requeued or recorded as failed alike."""
+        # Imported here: scraping and downloading do not need the annotator
+        import auto_annotator
+        # Fail before anything is downloaded when no Gemini key is configured
+        auto_annotator.get_gemini_key_pool()
+        metrics.reset()
+        download_dir = Path(self.download_dir)
+        download_dir.mkdir(exist_ok=True)
+        concurrency = self.get_download_concurrency()
+        output = output or auto_annotator.CSV_OUTPUT_FILE
+        done = {name for name, category in auto_annotator.load_category_index(output).items()
+                if category not in auto_annotator.RETRY_CATEGORIES}
+        if papers is None:
+            papers = self.metadata_list
+        else:
+            self.log(f"Search filter: processing {len(papers)} of {len(self.metadata_list)} papers.")
+        selected = len(papers)
+        papers = [paper for paper in self.without_duplicates(papers) if pdf_filename(paper) not in done]
+        duplicates = get_metadata_store().duplicates_by_canonical()
+        total = len(papers)
+        self.log(f"Pipeline: {selected - total} papers already categorized in {output}, {total} to process.")
+        if not papers:
+            return
+        store = get_metadata_store()
+        store.enqueue_downloads(download_dir, papers, self.DOWNLOAD_NEWEST_FIRST)
+        store.reclaim_stale_leases(download_dir)
+        owner = self.download_owner()
+        self.download_errors = {}
+        self.download_manifest = self.load_download_manifest(download_dir)
+        csv_writer = auto_annotator.CategoryCSVWriter(output)
+        completed = 0
+
+        async def lease(name: str) -> Optional[Dict]:
+            """Leases the paper's job, waiting while another run holds it. None once the job
+               is done (or failed) without this run."""
+            while True:
+                jobs = store.lease_downloads(download_dir, owner, 1, self.DOWNLOAD_LEASE_SECONDS, [name])
+                if jobs:
+                    return jobs[0]
+                status = store.download_status(download_dir, [name])
+                if status['next_lease_expiry'] is None:
+                    return None
+                await asyncio.sleep(min(max(0.0, status['next_lease_expiry'] - time.time()),
+                                        self.DOWNLOAD_QUEUE_POLL_SECONDS))
+
+        async def download(paper: Dict) -> Optional[str]:
+            name = pdf_filename(paper)
+            path = download_dir / name
+            job = await lease(name)
+            if job is None:
+                # Finished by an earlier run
+                return str(path) if path.exists() else None
+            while True:
+                with metrics.in_flight('downloads_in_flight'), metrics.timer('download_pdf_seconds'):
+                    success = await self.download_pdf(session, job['pdf_link'], str(path))
+                metrics.inc('downloads_total', result='ok' if success else 'failed')
+                error = self.download_errors.pop(job['pdf_link'], None)
+                # Only transient failures are requeued; a 404 will not come back within this run
+                max_attempts = 1 if error == PERMANENT else self.DOWNLOAD_JOB_MAX_ATTEMPTS
+                store.finish_download(download_dir, name, owner, success, error, max_attempts)
+                self.download_manifest.setdefault(path.name, {})['state'] = 'done' if success else 'failed'
+                if success:
+                    return str(path)
+                if job['attempts'] + 1 >= max_attempts:
+                    return None
+                self.log(f"Retrying {path.stem} (attempt {job['attempts'] + 1}/{self.DOWNLOAD_JOB_MAX_ATTEMPTS} failed)")
+                job = await lease(name)
+                if job is None:
+                    return str(path) if path.exists() else None
+
+        def record(paper: Dict, category: str):
+            nonlocal completed
+            name = pdf_filename(paper)
+            csv_writer.add(name, category)
+            metrics.inc('papers_categorized_total', category=category)
+            for duplicate in duplicates.get(name, []):
+                csv_writer.add(duplicate, category)
+                metrics.inc('duplicates_reused_total')
+            completed += 1
+            self.log(f"[{completed}/{total}] {paper['title']}: {category}")
+            self.on_progress((completed / total) * 100)
+
+        pipeline = PaperPipeline(download, auto_annotator.extract_abstract_timed, auto_annotator.categorize_papers_async,
+                                 record, self.log,
+                                 download_workers=concurrency,
+                                 extract_workers=self.PIPELINE_EXTRACTION_WORKERS or auto_annotator.EXTRACTION_WORKERS,
+                                 categorize_workers=auto_annotator.MAX_CONCURRENT_REQUESTS,
+                                 queue_size=self.PIPELINE_QUEUE_SIZE,
+                                 batch_size=auto_annotator.CATEGORIZATION_BATCH_SIZE,
+                                 batch_wait=self.PIPELINE_BATCH_WAIT_SECONDS)
+        async with aiohttp.ClientSession(connector=self.download_connector(concurrency)) as session:
+            renewer = asyncio.create_task(self.renew_download_leases(owner))
+            try:
+                await pipeline.run(papers)
+            finally:
+                renewer.cancel()
+                store.release_leases(owner)
+                csv_writer.close()
+                self.save_download_manifest(download_dir)
+        if auto_annotator.USE_LOCAL_MODEL:
+            self.log(auto_annotator.get_label_model().report())
+        self.log(metrics.summary())
+
+    def scrape(self) -> List[Dict]:
+        """Scrapes start_year..end_year into the metadata store and metadata_list."""
+        self.metadata_list = asyncio.run(self.scrape_metadata_async())
+        return self.metadata_list
+
+    def ensure_metadata(self) -> bool:
+        """Fills metadata_list from the metadata store, or by scraping when it is empty.
+           Returns whether it had to."""
+        if self.metadata_list:
+            return False
+        store = self.open_metadata_store()
+        if store.paper_count():
+            self.log(f"Loading metadata from {store.db_path}...")
+            self.metadata_list = store.papers()
+        else:
+            self.log("No metadata found. Scraping metadata now...")
+            self.scrape()
+        return True
+
+    def download(self, papers: Optional[List[Dict]] = None):
+        """Downloads the PDFs of `papers` (default: all of metadata_list) to download_dir."""
+        self.ensure_metadata()
+        asyncio.run(self.download_pdfs_async(papers))
+
+    def download_and_categorize(self, papers: Optional[List[Dict]] = None, output: Optional[str] = None):
+        self.ensure_metadata()
+        asyncio.run(self.pipeline_async(papers, output))
 
 if __name__ == "__main__":
-    app = NeurIPSScraper()
-    app.mainloop()
+    # The GUI lives in its own module so that importing this one does not need tkinter
+    from scraper_gui import main
+    main()
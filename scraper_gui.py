@@ -0,0 +1,393 @@
+import os
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+from typing import List, Dict, Optional, Tuple
+
+import auto_annotator
+from metadata_store import get_metadata_store
+from metrics import MetricsExporter
+from paper_index import PaperIndex, search_tokens
+from scraper import DEFAULT_DOWNLOAD_DIR, DEFAULT_END_YEAR, DEFAULT_START_YEAR, PaperScraper
+from ui_pump import UIUpdatePump, WindowedTreeview
+
+class NeurIPSScraper(tk.Tk):
+    """Window for scraper.PaperScraper, with a searchable table of the scraped papers."""
+    
+    PRIMARY_COLOR = '#E74C3C'   
+    SECONDARY_COLOR = '#C0392B'  
+    BACKGROUND_COLOR = '#2C3E50' 
+    ACCENT_COLOR = '#27AE60'     
+    TEXT_COLOR = '#ECF0F1'
+
+    def __init__(self):
+        super().__init__()
+        self.title("NeurIPS Paper Scraper")
+        self.configure(bg=self.BACKGROUND_COLOR)
+        self.state('zoomed')
+        self.paper_index = PaperIndex()
+        self.paper_rows = []
+        # Ids in paper_index of the papers matching the search bar; None when no filter is set
+        self.filtered_ids = None
+        self.create_styles()
+        self.initialize_gui()
+        self.scraper = PaperScraper(on_log=self.log,
+                                    on_papers=lambda papers: self.ui.call(self.append_papers, papers),
+                                    on_progress=lambda percent: self.ui.set_var(self.progress_var, percent))
+        if PaperScraper.METRICS_SNAPSHOT_FILE or PaperScraper.METRICS_PORT is not None:
+            MetricsExporter(snapshot_path=PaperScraper.METRICS_SNAPSHOT_FILE, port=PaperScraper.METRICS_PORT).start()
+
+    def create_styles(self):
+        style = ttk.Style()
+        style.theme_use('clam')
+
+        #styling
+        style.configure('TFrame', background=self.BACKGROUND_COLOR)
+        style.configure('TLabelFrame', background=self.BACKGROUND_COLOR,
+                        foreground=self.TEXT_COLOR, font=('Helvetica', 12, 'bold'))
+        style.configure('TLabel', background=self.BACKGROUND_COLOR,
+                        foreground=self.TEXT_COLOR, font=('Helvetica', 12))
+        style.configure('Header.TLabel', font=('Helvetica', 26, 'bold'),
+                        foreground='white')
+        style.configure('TEntry', fieldbackground='white', foreground='black')
+        style.configure('TButton', 
+                        background=self.PRIMARY_COLOR, 
+                        foreground='white', 
+                        font=('Helvetica', 14, 'bold'),
+                        borderwidth=0, 
+                        focusthickness=3, 
+                        padding=(10, 6))  
+        style.map('TButton',
+                  background=[('active', self.SECONDARY_COLOR)],
+                  foreground=[('active', 'white')])
+
+        style.configure('TCombobox', fieldbackground='white', foreground='black', font=('Helvetica', 12))
+        style.configure("Treeview",
+                        background="white",
+                        foreground="black",
+                        fieldbackground="white",
+                        font=('Helvetica', 12))
+        style.configure("Treeview.Heading",
+                        background=self.PRIMARY_COLOR,
+                        foreground="white",
+                        font=('Helvetica', 12, 'bold'))
+
+    def initialize_gui(self):
+       
+       #Styling and Color Scheme
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+        header_frame = ttk.Frame(self)
+        header_frame.grid(row=0, column=0, columnspan=2, sticky='ew', padx=20, pady=(20, 10))
+        title_label = ttk.Label(header_frame, text="NeurIPS Paper Scraper", style='Header.TLabel')
+        title_label.pack(anchor='center')
+        
+        sidebar_frame = ttk.Frame(self)
+        sidebar_frame.grid(row=1, column=0, sticky='nsw', padx=(20,10), pady=10)
+        sidebar_frame.columnconfigure(0, weight=1)
+        
+        options_frame = ttk.LabelFrame(sidebar_frame, text="Options", padding=10)
+        options_frame.grid(row=0, column=0, sticky='new', pady=(0, 20))
+        
+        current_year = time.localtime().tm_year
+        years = list(range(1990, current_year + 1))
+        
+        # Start Year
+        year_frame = ttk.Frame(options_frame)
+        year_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(year_frame, text="Start Year:").pack(side=tk.LEFT, padx=5)
+        self.start_year = ttk.Combobox(year_frame, values=years, width=8, state='readonly', font=('Helvetica', 12))
+        self.start_year.set(DEFAULT_START_YEAR)
+        self.start_year.pack(side=tk.LEFT, padx=5)
+        
+        # End Year
+        year_frame2 = ttk.Frame(options_frame)
+        year_frame2.pack(fill=tk.X, pady=5)
+        ttk.Label(year_frame2, text="End Year:").pack(side=tk.LEFT, padx=5)
+        self.end_year = ttk.Combobox(year_frame2, values=years, width=8, state='readonly', font=('Helvetica', 12))
+        self.end_year.set(DEFAULT_END_YEAR)
+        self.end_year.pack(side=tk.LEFT, padx=5)
+        
+        # Download Folder with Browse button 
+        dir_frame = ttk.Frame(options_frame)
+        dir_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(dir_frame, text="Download Folder:").grid(row=0, column=0, padx=5, sticky=tk.W)
+        self.download_dir = ttk.Entry(dir_frame, font=('Helvetica', 12))
+        self.download_dir.insert(0, DEFAULT_DOWNLOAD_DIR)
+        self.download_dir.grid(row=0, column=1, padx=5, sticky=tk.EW)
+        ttk.Button(dir_frame, text="Browse...", command=self.browse_directory).grid(row=0, column=2, padx=5, sticky=tk.E)
+        dir_frame.columnconfigure(1, weight=1)
+        
+        # Parallel downloads
+        concurrency_frame = ttk.Frame(options_frame)
+        concurrency_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(concurrency_frame, text="Parallel Downloads:").pack(side=tk.LEFT, padx=5)
+        self.download_concurrency = ttk.Spinbox(concurrency_frame, from_=1, to=64, width=6, font=('Helvetica', 12))
+        self.download_concurrency.set(PaperScraper.MAX_CONCURRENT_DOWNLOADS)
+        self.download_concurrency.pack(side=tk.LEFT, padx=5)
+        
+        self.fetch_abstracts = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Fetch Abstracts", variable=self.fetch_abstracts).pack(anchor=tk.W, padx=5, pady=5)
+        self.skip_stored_years = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Skip Years Already Saved", variable=self.skip_stored_years).pack(anchor=tk.W, padx=5, pady=5)
+        self.offline_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Offline (Cached Pages Only)", variable=self.offline_mode).pack(anchor=tk.W, padx=5, pady=5)
+        
+        buttons_frame = ttk.Frame(options_frame)
+        buttons_frame.pack(fill=tk.X, pady=10)
+        
+        self.scrape_button = ttk.Button(buttons_frame, text="Scrape Metadata", command=self.scrape_metadata)
+        self.scrape_button.pack(fill=tk.X, pady=5)
+        
+        self.download_button = ttk.Button(buttons_frame, text="Download PDFs", command=self.download_pdfs)
+        self.download_button.pack(fill=tk.X, pady=5)
+        
+        self.pipeline_button = ttk.Button(buttons_frame, text="Download + Categorize", command=self.run_pipeline)
+        self.pipeline_button.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(buttons_frame, text="Download Status", command=self.show_download_status).pack(fill=tk.X, pady=5)
+        
+        self.categorize_button = ttk.Button(buttons_frame, text="Categorization", command=self.open_categorization)
+        self.categorize_button.pack(fill=tk.X, pady=5)
+        
+        content_frame = ttk.Frame(self)
+        content_frame.grid(row=1, column=1, sticky='nsew', padx=(10,20), pady=10)
+        content_frame.columnconfigure(0, weight=1)
+        content_frame.rowconfigure(1, weight=1)
+
+        # Search bar: filters the table on every keystroke; downloads act on the results
+        filter_frame = ttk.Frame(content_frame)
+        filter_frame.grid(row=0, column=0, sticky='ew', pady=(0, 5))
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *args: self.apply_filter())
+        ttk.Entry(filter_frame, textvariable=self.search_var, font=('Helvetica', 12)).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Label(filter_frame, text="Year:").pack(side=tk.LEFT, padx=5)
+        self.filter_year = ttk.Combobox(filter_frame, values=["All"], width=6, state='readonly', font=('Helvetica', 12))
+        self.filter_year.set("All")
+        self.filter_year.bind('<<ComboboxSelected>>', lambda event: self.apply_filter())
+        self.filter_year.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="Category:").pack(side=tk.LEFT, padx=5)
+        self.filter_category = ttk.Combobox(filter_frame, values=["All"], width=18, state='readonly',
+                                            font=('Helvetica', 12), postcommand=self.refresh_categories)
+        self.filter_category.set("All")
+        self.filter_category.bind('<<ComboboxSelected>>', lambda event: self.apply_filter())
+        self.filter_category.pack(side=tk.LEFT, padx=5)
+        self.filter_status = ttk.Label(filter_frame, text="")
+        self.filter_status.pack(side=tk.LEFT, padx=5)
+
+        # Creating table; only the rows on screen are materialized
+        columns = ("Title", "Authors", "Year", "PDF Link")
+        self.tree = WindowedTreeview(content_frame, columns,
+                                     widths={"Title": 300, "Authors": 200, "Year": 70, "PDF Link": 200})
+        self.tree.grid(row=1, column=0, sticky='nsew')
+        
+        footer_frame = ttk.Frame(self)
+        footer_frame.grid(row=2, column=0, columnspan=2, sticky='ew', padx=20, pady=(10,20))
+        self.progress_var = tk.DoubleVar()
+        self.progress_bar = ttk.Progressbar(footer_frame, variable=self.progress_var, maximum=100)
+        self.progress_bar.pack(fill=tk.X, pady=(0,5))
+        
+        # Log area below progress bar
+        self.log_area = scrolledtext.ScrolledText(footer_frame, height=8, bg='white',
+                                                   fg='black', font=('Helvetica', 12))
+        self.log_area.pack(fill=tk.BOTH, expand=True)
+        
+        # All widget updates from worker threads go through this queue
+        self.ui = UIUpdatePump(self, self.log_area)
+        self.ui.start()
+
+    def browse_directory(self):
+        directory = filedialog.askdirectory(initialdir=os.getcwd(), title="Select PDF Download Directory")
+        if directory:
+            self.download_dir.delete(0, tk.END)
+            self.download_dir.insert(0, directory)
+
+    def log(self, message: str):
+        self.ui.log(message)
+
+    def paper_row(self, paper: Dict) -> Tuple:
+        return (paper['title'], paper['authors'], paper['year'], paper['pdf_link'])
+
+    def build_paper_index(self, papers: List[Dict]) -> PaperIndex:
+        """Search index over `papers` with the stored categories. Slow for large lists, so it is
+           built on worker threads and handed to show_papers."""
+        return PaperIndex(papers, get_metadata_store().latest_categories())
+
+    def show_papers(self, papers: List[Dict], index: Optional[PaperIndex] = None):
+        self.paper_index = index if index is not None else self.build_paper_index(papers)
+        self.paper_rows = [self.paper_row(paper) for paper in self.paper_index.papers]
+        self.refresh_facets()
+        self.apply_filter()
+
+    def append_papers(self, papers: List[Dict]):
+        self.paper_index.add(papers)
+        rows = [self.paper_row(paper) for paper in papers]
+        self.paper_rows.extend(rows)
+        self.refresh_facets()
+        if self.filtered_ids is None:
+            self.tree.append_rows(rows)
+            self.filter_status.config(text=f"{len(self.paper_rows)} papers")
+        else:
+            self.apply_filter()
+
+    def clear_papers(self):
+        self.paper_index = PaperIndex()
+        self.paper_rows = []
+        self.tree.clear()
+        self.refresh_facets()
+        self.apply_filter()
+
+    def refresh_facets(self):
+        self.filter_year.config(values=["All"] + self.paper_index.year_values())
+
+    def refresh_categories(self):
+        """Reloads the category facet when its list is opened, since papers are categorized
+           by the annotator while this window is open."""
+        self.paper_index.set_categories(get_metadata_store().latest_categories())
+        self.filter_category.config(values=["All"] + self.paper_index.category_values())
+
+    def apply_filter(self):
+        """Shows the papers matching the search words (title and author prefixes), year and
+           category. Cheap enough to run on every keystroke."""
+        query = self.search_var.get()
+        year = self.filter_year.get()
+        year = None if year in ("", "All") else year
+        category = self.filter_category.get()
+        category = None if category in ("", "All") else category
+        total = len(self.paper_rows)
+        if not (search_tokens(query) or year or category):
+            self.filtered_ids = None
+            self.tree.set_rows(self.paper_rows)
+            self.filter_status.config(text=f"{total} papers")
+            return
+        self.filtered_ids = self.paper_index.search(query, year, category)
+        rows = self.paper_rows
+        self.tree.set_rows([rows[paper_id] for paper_id in self.filtered_ids])
+        self.filter_status.config(text=f"{len(self.filtered_ids)} of {total} papers")
+
+    def apply_settings(self):
+        """Copies the options set in the window to the scraper. Called on the UI thread when a
+           run is started."""
+        self.scraper.start_year = int(self.start_year.get())
+        self.scraper.end_year = int(self.end_year.get())
+        self.scraper.download_dir = self.download_dir.get()
+        self.scraper.download_concurrency = self.download_concurrency.get()
+        self.scraper.fetch_abstracts = self.fetch_abstracts.get()
+        self.scraper.skip_stored_years = self.skip_stored_years.get()
+        self.scraper.offline = self.offline_mode.get()
+
+    def selected_papers(self) -> Optional[List[Dict]]:
+        """The search results while a filter is set, else None (all of metadata_list). Read
+           on the UI thread when a download is started."""
+        if self.filtered_ids is None:
+            return None
+        papers = self.paper_index.papers
+        return [papers[paper_id] for paper_id in self.filtered_ids]
+
+    def run_in_background(self, work, button, title, on_done):
+        """Runs work() in a worker thread, then on_done(its result) on the UI thread. If work
+           raises, the error is logged and shown instead of on_done, and `button` is enabled
+           again."""
+        def run():
+            try:
+                result = work()
+            except Exception as e:
+                message = str(e) if isinstance(e, auto_annotator.MissingAPIKeyError) else f"{title} failed: {e}"
+                self.log(message)
+                self.ui.call(self.finish_failed, button, title, message)
+            else:
+                self.ui.call(on_done, result)
+        threading.Thread(target=run, daemon=True).start()
+
+    def finish_failed(self, button, title, message):
+        button.config(state=tk.NORMAL)
+        messagebox.showerror(title, message)
+
+    def scrape_metadata(self):
+        self.scrape_button.config(state=tk.DISABLED)
+        self.apply_settings()
+        self.clear_papers()
+        self.progress_var.set(0)
+        def run_scrape():
+            start_time = time.time()
+            papers = self.scraper.scrape()
+            elapsed_time = time.time() - start_time
+            return papers, elapsed_time, self.build_paper_index(papers)
+        self.run_in_background(run_scrape, self.scrape_button, "Scraping", lambda result: self.finish_scrape(*result))
+
+    def finish_scrape(self, papers, elapsed_time, index=None):
+        self.show_papers(papers, index)
+        self.scrape_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Scraping Complete",
+                            f"Scraped {len(papers)} papers\nTotal time: {elapsed_time:.2f} seconds")
+
+    def ensure_metadata(self):
+        """Loads or scrapes the metadata if none is loaded yet, and shows it. Called from
+           worker threads."""
+        if self.scraper.ensure_metadata():
+            papers = self.scraper.metadata_list
+            self.ui.call(self.show_papers, papers, self.build_paper_index(papers))
+
+    def download_pdfs(self):
+        self.download_button.config(state=tk.DISABLED)
+        self.progress_var.set(0)
+        self.apply_settings()
+        papers = self.selected_papers()
+        def run_download():
+            self.ensure_metadata()
+            self.scraper.download(papers)
+        self.run_in_background(run_download, self.download_button, "PDF Download", lambda _: self.finish_download())
+
+    def finish_download(self):
+        self.download_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Download Complete", "PDF Download Complete")
+        
+    def run_pipeline(self):
+        self.pipeline_button.config(state=tk.DISABLED)
+        self.progress_var.set(0)
+        self.apply_settings()
+        papers = self.selected_papers()
+        def run():
+            self.ensure_metadata()
+            self.scraper.download_and_categorize(papers)
+        self.run_in_background(run, self.pipeline_button, "Download + Categorize", lambda _: self.finish_pipeline())
+
+    def finish_pipeline(self):
+        self.pipeline_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Download + Categorize", "Download and categorization complete")
+
+    def open_categorization(self):
+        """Categorizes the downloaded papers (the search results while a filter is set) in this
+           process: the scraped titles, abstracts and PDF paths go straight to
+           auto_annotator.Categorizer, and results go to its CSV_OUTPUT_FILE."""
+        self.categorize_button.config(state=tk.DISABLED)
+        self.progress_var.set(0)
+        self.apply_settings()
+        papers = self.selected_papers()
+        def run():
+            self.ensure_metadata()
+            categorizer = auto_annotator.Categorizer(
+                on_log=self.log, on_progress=lambda percent: self.ui.set_var(self.progress_var, percent))
+            categories = categorizer.process_papers(papers if papers is not None else self.scraper.metadata_list,
+                                                    self.scraper.download_dir, resume=True)
+            return f"Categorized {len(categories)} papers into {categorizer.output}"
+        self.run_in_background(run, self.categorize_button, "Categorization", self.finish_categorization)
+
+    def finish_categorization(self, message):
+        self.categorize_button.config(state=tk.NORMAL)
+        # New categories show up in the category filter
+        self.refresh_categories()
+        messagebox.showinfo("Categorization", message)
+
+    def show_download_status(self):
+        self.apply_settings()
+        self.scraper.log_download_status()
+
+def main():
+    app = NeurIPSScraper()
+    app.mainloop()
+
+if __name__ == "__main__":
+    main()
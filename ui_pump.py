@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+
+class UIUpdatePump:
+    """Single path for UI updates from any thread. Workers post to a thread-safe queue and the
+       Tk main loop drains it with after() for at most `budget_ms` per tick, so large bursts of
+       updates never freeze the window. Log lines posted between two ticks are inserted with one
+       Text insert, and variables only receive the latest value posted in a tick."""
+    def __init__(self, root, log_area, interval_ms=50, budget_ms=15, max_log_lines=5000):
+        self.root = root
+        self.log_area = log_area
+        self.interval_ms = interval_ms
+        self.budget = budget_ms / 1000.0
+        self.max_log_lines = max_log_lines
+        self.queue = queue.Queue()
+        self.pending_vars = {}
+        self.vars_lock = threading.Lock()
+
+    def start(self):
+        self.root.after(self.interval_ms, self.drain)
+
+    def log(self, message):
+        self.queue.put(('log', message))
+
+    def call(self, func, *args):
+        self.queue.put(('call', (func, args)))
+
+    def set_var(self, variable, value):
+        with self.vars_lock:
+            self.pending_vars[str(variable)] = (variable, value)
+
+    def drain(self):
+        try:
+            self.drain_once()
+        finally:
+            self.root.after(self.interval_ms, self.drain)
+
+    def drain_once(self):
+        deadline = time.perf_counter() + self.budget
+        lines = []
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    kind, payload = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'log':
+                    lines.append(payload)
+                else:
+                    func, args = payload
+                    func(*args)
+        finally:
+            if lines:
+                self.append_log("\n".join(lines) + "\n")
+
+        with self.vars_lock:
+            pending_vars, self.pending_vars = self.pending_vars, {}
+        for variable, value in pending_vars.values():
+            variable.set(value)
+
+    def append_log(self, text):
+        self.log_area.insert(tk.END, text)
+        line_count = int(self.log_area.index('end-1c').split('.')[0])
+        if line_count > self.max_log_lines:
+            self.log_area.delete('1.0', f"{line_count - self.max_log_lines + 1}.0")
+        self.log_area.see(tk.END)
+
+
+class WindowedTreeview(ttk.Frame):
+    """Treeview that only materializes the rows currently on screen. All rows live in a plain
+       list; scrolling re-fills a fixed set of items, so memory and redraw cost stay flat no
+       matter how many rows are loaded. Must only be used from the Tk main thread."""
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, parent, columns, widths=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.rows = []
+        self.first = 0
+        self.page_size = 30
+        self.tree = ttk.Treeview(self, columns=columns, show='headings')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=(widths or {}).get(col, 200))
+
+        vsb = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.vsb = vsb
+        self.tree.configure(xscrollcommand=hsb.set)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        hsb.grid(row=1, column=0, sticky='ew')
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_by(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(1, 'units'))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def clear(self):
+        self.rows = []
+        self.first = 0
+        self.render()
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.first = 0
+        self.render()
+
+    def append_rows(self, rows):
+        # Keep following the end of the list if the view was already there
+        following = self.first + self.page_size >= len(self.rows)
+        self.rows.extend(rows)
+        if following:
+            self.first = max(0, len(self.rows) - self.page_size)
+        self.render()
+
+    def append_row(self, row):
+        self.append_rows([row])
+
+    def visible_rows(self):
+        return self.rows[self.first:self.first + self.page_size]
+
+    def on_resize(self, event):
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or self.DEFAULT_ROW_HEIGHT
+        # One row's worth of height goes to the heading
+        page_size = max(1, event.height // int(row_height) - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.first = int(float(amount) * len(self.rows))
+            self.render()
+        else:
+            self.scroll_by(int(amount), unit)
+
+    def scroll_by(self, amount, unit):
+        step = self.page_size if unit == 'pages' else 1
+        self.first += amount * step
+        self.render()
+
+    def render(self):
+        self.first = max(0, min(self.first, len(self.rows) - self.page_size))
+        window = self.visible_rows()
+        items = self.tree.get_children()
+        for index, row in enumerate(window):
+            if index < len(items):
+                self.tree.item(items[index], values=row)
+            else:
+                self.tree.insert('', tk.END, values=row)
+        if len(items) > len(window):
+            self.tree.delete(*items[len(window):])
+
+        if self.rows:
+            self.vsb.set(self.first / len(self.rows), (self.first + len(window)) / len(self.rows))
+        else:
+            self.vsb.set(0, 1)